@@ -0,0 +1,80 @@
+"""Project permission checks shared by the project-scoped views.
+
+``get_project`` loads a project together with whether the current user owns
+it or collaborates on it, using one query with an ``EXISTS`` lookup on the
+collaborator table instead of loading every collaborator. The result is kept
+on the request, so checking the same project again costs nothing.
+"""
+from functools import wraps
+
+from django.contrib import messages
+from django.db.models import Exists, OuterRef
+from django.http import JsonResponse
+from django.shortcuts import redirect
+
+from .models import Project
+
+
+def get_project(request, project_id):
+    """Return the project with ``is_owner``, ``is_collaborator`` and ``can_view`` set for request.user.
+
+    Returns None if the project doesn't exist.
+    """
+    cache = request.__dict__.setdefault('_project_access', {})
+    project_id = int(project_id)
+    if project_id not in cache:
+        is_collaborator = Project.collaborators.through.objects.filter(
+            project_id=OuterRef('pk'), user_id=request.user.pk
+        )
+        project = Project.objects.annotate(is_collaborator=Exists(is_collaborator)).filter(id=project_id).first()
+        if project is not None:
+            project.is_owner = project.user_id == request.user.pk
+            project.can_view = project.is_owner or project.is_collaborator
+        cache[project_id] = project
+    return cache[project_id]
+
+
+def check_project_access(request, project, owner_message=None, json=False):
+    """Return the response that denies request.user access to ``project``, or None if access is allowed.
+
+    Anyone who can view the project is allowed unless ``owner_message`` is
+    given, in which case only the owner is and others get that message.
+    """
+    if project is None:
+        if json:
+            return JsonResponse({'error': 'Project not found'}, status=404)
+        messages.error(request, "Project not found.")
+        return redirect('timeline_app:dashboard')
+
+    if not project.can_view:
+        if json:
+            return JsonResponse({'error': "You don't have permission to view this project"}, status=403)
+        messages.error(request, "You don't have permission to view this project.")
+        return redirect('timeline_app:dashboard')
+
+    if owner_message and not project.is_owner:
+        if json:
+            return JsonResponse({'error': owner_message}, status=403)
+        messages.error(request, owner_message)
+        return redirect('timeline_app:project_detail', project_id=project.id)
+
+    return None
+
+
+def project_access_required(owner_message=None, json=False):
+    """Decorate a view taking ``project_id`` so it only runs for users who may access the project.
+
+    The project is available to the view as ``request.project``. See
+    ``check_project_access`` for the arguments.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, project_id, *args, **kwargs):
+            project = get_project(request, project_id)
+            denied = check_project_access(request, project, owner_message, json)
+            if denied is not None:
+                return denied
+            request.project = project
+            return view(request, project_id, *args, **kwargs)
+        return wrapper
+    return decorator
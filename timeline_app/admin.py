@@ -1,6 +1,54 @@
+from collections import Counter
+
+from django import forms
 from django.contrib import admin
-from .models import Project, Milestone, Notification
+from django.db import transaction
+from .forms import MilestoneDependenciesMixin
+from .models import Project, Milestone, Notification, OutgoingEmail
+from .notifications import adjust_unread_counts, uncount_notifications
+
+
+class MilestoneAdminForm(MilestoneDependenciesMixin, forms.ModelForm):
+    class Meta:
+        model = Milestone
+        fields = '__all__'
+
+
+class MilestoneAdmin(admin.ModelAdmin):
+    form = MilestoneAdminForm
+
+
+class NotificationAdmin(admin.ModelAdmin):
+    """Keeps the unread counters in step with deletes and edits made in the admin."""
+    list_display = ('user', 'notification_type', 'is_read', 'created_at')
+    list_filter = ('notification_type', 'is_read')
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            previous = Notification.objects.filter(pk=obj.pk).values_list('user_id', 'is_read').first() \
+                if change else None
+            # New notifications are counted by the post_save handler in signals.py
+            super().save_model(request, obj, form, change)
+            if previous is not None:
+                deltas = Counter()
+                if not previous[1]:
+                    deltas[previous[0]] -= 1
+                if not obj.is_read:
+                    deltas[obj.user_id] += 1
+                adjust_unread_counts(deltas)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            uncount_notifications(Notification.objects.filter(pk=obj.pk))
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            uncount_notifications(queryset)
+            super().delete_queryset(request, queryset)
+
 
 admin.site.register(Project)
-admin.site.register(Milestone)
-admin.site.register(Notification)
\ No newline at end of file
+admin.site.register(Milestone, MilestoneAdmin)
+admin.site.register(Notification, NotificationAdmin)
+admin.site.register(OutgoingEmail)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TimelineAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'timeline_app'
+
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,193 @@
+"""Maintenance and queries for the ``MilestoneClosure`` dependency index.
+
+Each closure row says that ``descendant`` depends on ``ancestor``, and
+``depth`` is the length of the shortest dependency chain between them. Adding
+an edge can only shorten or add chains, so it is applied directly; removing
+one recomputes the rows of the milestones downstream of it. The implicit
+zero-depth row of a milestone to itself is not stored.
+"""
+from collections import defaultdict, deque
+
+from .models import Milestone, MilestoneClosure
+from .scheduling import DependencyCycleError, load_project_graph, topological_order
+
+MilestoneDependency = Milestone.dependencies.through
+
+
+def ancestor_ids(milestone_id):
+    """Return the ids of every milestone that ``milestone_id`` transitively depends on."""
+    return set(
+        MilestoneClosure.objects.filter(descendant_id=milestone_id).values_list('ancestor_id', flat=True)
+    )
+
+
+def descendant_ids(milestone_id):
+    """Return the ids of every milestone that transitively depends on ``milestone_id``."""
+    return set(
+        MilestoneClosure.objects.filter(ancestor_id=milestone_id).values_list('descendant_id', flat=True)
+    )
+
+
+def would_create_cycle(dependent_id, dependency_id):
+    """Return True if making ``dependent_id`` depend on ``dependency_id`` would create a cycle."""
+    if dependent_id == dependency_id:
+        return True
+    return MilestoneClosure.objects.filter(ancestor_id=dependent_id, descendant_id=dependency_id).exists()
+
+
+def _save(depths, existing):
+    """Write the ``{(ancestor, descendant): depth}`` rows that differ from the ``existing`` rows."""
+    to_create, to_update = [], []
+    for (ancestor, descendant), depth in depths.items():
+        row = existing.get((ancestor, descendant))
+        if row is None:
+            to_create.append(MilestoneClosure(ancestor_id=ancestor, descendant_id=descendant, depth=depth))
+        elif row.depth != depth:
+            row.depth = depth
+            to_update.append(row)
+
+    if to_create:
+        MilestoneClosure.objects.bulk_create(to_create, batch_size=1000)
+    if to_update:
+        MilestoneClosure.objects.bulk_update(to_update, ['depth'], batch_size=1000)
+
+
+def add_dependency(dependent_id, dependency_id):
+    """Record that ``dependent_id`` now depends on ``dependency_id``.
+
+    Raises DependencyCycleError if the new edge would close a cycle.
+    """
+    if would_create_cycle(dependent_id, dependency_id):
+        raise DependencyCycleError("A milestone cannot depend on a milestone that depends on it")
+
+    ups = [(dependency_id, 0)] + list(
+        MilestoneClosure.objects.filter(descendant_id=dependency_id).values_list('ancestor_id', 'depth')
+    )
+    downs = [(dependent_id, 0)] + list(
+        MilestoneClosure.objects.filter(ancestor_id=dependent_id).values_list('descendant_id', 'depth')
+    )
+    existing = {
+        (row.ancestor_id, row.descendant_id): row
+        for row in MilestoneClosure.objects.filter(
+            ancestor_id__in=[a for a, _ in ups], descendant_id__in=[d for d, _ in downs]
+        )
+    }
+
+    # Keep the existing depth where the new edge doesn't give a shorter chain
+    depths = {}
+    for ancestor, up_depth in ups:
+        for descendant, down_depth in downs:
+            depth = up_depth + 1 + down_depth
+            row = existing.get((ancestor, descendant))
+            depths[(ancestor, descendant)] = depth if row is None else min(row.depth, depth)
+    _save(depths, existing)
+
+
+def _refresh(milestone_ids, removed_edges=(), removed_milestones=()):
+    """Recompute the rows of ``milestone_ids`` and of every milestone that depends on them.
+
+    Edges in ``removed_edges`` and edges to ``removed_milestones`` are ignored,
+    since the handlers call this before those rows are deleted. Milestones
+    outside the affected set keep their ancestors, so their rows are reused.
+    """
+    removed_edges = set(removed_edges)
+    removed_milestones = set(removed_milestones)
+    affected = set(milestone_ids) | set(
+        MilestoneClosure.objects.filter(ancestor_id__in=milestone_ids).values_list('descendant_id', flat=True)
+    )
+    affected -= removed_milestones
+    if not affected:
+        return
+
+    predecessors = defaultdict(list)
+    for dependent, dependency in MilestoneDependency.objects.filter(
+        from_milestone_id__in=affected
+    ).values_list('from_milestone_id', 'to_milestone_id'):
+        if (dependent, dependency) not in removed_edges and dependency not in removed_milestones:
+            predecessors[dependent].append(dependency)
+
+    outside = {pred for preds in predecessors.values() for pred in preds if pred not in affected}
+    ancestors = defaultdict(dict)
+    for ancestor, descendant, depth in MilestoneClosure.objects.filter(
+        descendant_id__in=outside
+    ).values_list('ancestor_id', 'descendant_id', 'depth'):
+        ancestors[descendant][ancestor] = depth
+
+    # Visit the affected milestones after the ones they depend on
+    in_degree = dict.fromkeys(affected, 0)
+    successors = defaultdict(list)
+    for node, preds in predecessors.items():
+        for pred in preds:
+            if pred in affected:
+                in_degree[node] += 1
+                successors[pred].append(node)
+    queue = deque(node for node, degree in in_degree.items() if degree == 0)
+    while queue:
+        node = queue.popleft()
+        reach = {}
+        for pred in predecessors[node]:
+            for ancestor, depth in [(pred, 0)] + list(ancestors[pred].items()):
+                if depth + 1 < reach.get(ancestor, depth + 2):
+                    reach[ancestor] = depth + 1
+        ancestors[node] = reach
+        for succ in successors[node]:
+            in_degree[succ] -= 1
+            if in_degree[succ] == 0:
+                queue.append(succ)
+
+    existing = {
+        (row.ancestor_id, row.descendant_id): row
+        for row in MilestoneClosure.objects.filter(descendant_id__in=affected)
+    }
+    depths = {
+        (ancestor, node): depth
+        for node in affected
+        for ancestor, depth in ancestors[node].items()
+    }
+    stale = [row.pk for key, row in existing.items() if key not in depths]
+    if stale:
+        MilestoneClosure.objects.filter(pk__in=stale).delete()
+    _save(depths, existing)
+
+
+def remove_dependencies(edges):
+    """Record that each ``(dependent_id, dependency_id)`` edge in ``edges`` is being removed."""
+    edges = set(edges)
+    if edges:
+        _refresh({dependent_id for dependent_id, _ in edges}, removed_edges=edges)
+
+
+def remove_milestone(milestone_id, deleted_ids=()):
+    """Drop the chains that pass through a milestone that is being deleted.
+
+    ``deleted_ids`` are other milestones deleted in the same operation whose
+    edges are still in the database.
+    """
+    _refresh([milestone_id], removed_milestones={milestone_id, *deleted_ids})
+
+
+def closure_rows(graph):
+    """Compute the closure rows of a graph loaded by ``scheduling.load_project_graph``."""
+    milestones = graph['milestones']
+    predecessors = graph['predecessors']
+    reach = [None] * len(milestones)
+
+    for node in topological_order(graph):
+        depths = {}
+        for pred in predecessors[node]:
+            for ancestor, depth in [(milestones[pred]['id'], 0)] + list(reach[pred].items()):
+                if depth + 1 < depths.get(ancestor, depth + 2):
+                    depths[ancestor] = depth + 1
+        reach[node] = depths
+
+    return [
+        MilestoneClosure(ancestor_id=ancestor, descendant_id=milestones[node]['id'], depth=depth)
+        for node, depths in enumerate(reach)
+        for ancestor, depth in depths.items()
+    ]
+
+
+def rebuild_project_closure(project):
+    """Recompute the closure rows of one project from its dependency edges."""
+    MilestoneClosure.objects.filter(descendant__project=project).delete()
+    MilestoneClosure.objects.bulk_create(closure_rows(load_project_graph(project)), batch_size=1000)
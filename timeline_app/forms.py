@@ -1,6 +1,7 @@
 from django import forms
 from django.core.exceptions import ValidationError
-from .models import Project, Milestone
+from .closure import descendant_ids
+from .models import Project, Milestone, MilestoneClosure
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
 
@@ -23,7 +24,25 @@ class ProjectForm(forms.ModelForm):
                 raise ValidationError("End date cannot be before start date")
         return cleaned_data
 
-class MilestoneForm(forms.ModelForm):
+class MilestoneDependenciesMixin:
+    """Rejects dependencies that would create a cycle, for every ModelForm that edits them.
+
+    The closure signal handlers also refuse cycles, but only by raising from
+    inside the save, so forms have to catch them first.
+    """
+    def clean_dependencies(self):
+        dependencies = self.cleaned_data.get('dependencies')
+        if self.instance.pk and dependencies:
+            dependent_ids = {self.instance.pk} | descendant_ids(self.instance.pk)
+            cyclic = [dependency.name for dependency in dependencies if dependency.pk in dependent_ids]
+            if cyclic:
+                raise ValidationError(
+                    "A milestone cannot depend on itself or on a milestone that depends on it: %(names)s",
+                    params={'names': ', '.join(cyclic)},
+                )
+        return dependencies
+
+class MilestoneForm(MilestoneDependenciesMixin, forms.ModelForm):
     class Meta:
         model = Milestone
         fields = ['name', 'start_date', 'due_date', 'duration', 'status', 'description', 'dependencies']
@@ -38,11 +57,14 @@ class MilestoneForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         
         # Limit dependencies to milestones within the same project
-        # Exclude the current milestone if we're editing
+        # Exclude the current milestone and everything that depends on it if we're editing,
+        # since depending on any of them would create a cycle
         if self.project:
             milestone_queryset = Milestone.objects.filter(project=self.project)
             if self.instance.pk:
-                milestone_queryset = milestone_queryset.exclude(pk=self.instance.pk)
+                milestone_queryset = milestone_queryset.exclude(pk=self.instance.pk).exclude(
+                    pk__in=MilestoneClosure.objects.filter(ancestor=self.instance).values('descendant_id')
+                )
             self.fields['dependencies'].queryset = milestone_queryset
             self.fields['dependencies'].label = "Depends on (milestones that must be completed first)"
             self.fields['dependencies'].widget = forms.CheckboxSelectMultiple()
@@ -95,6 +117,26 @@ class ProjectShareForm(forms.Form):
             raise forms.ValidationError("No user with this email address was found.")
         return email
 
+class MilestoneImportForm(forms.Form):
+    FORMAT_CHOICES = (
+        ('', 'Detect from file extension'),
+        ('csv', 'CSV'),
+        ('json', 'JSON'),
+    )
+
+    file = forms.FileField(label="Milestones file")
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        upload = cleaned_data.get('file')
+        if upload and not cleaned_data.get('format'):
+            extension = upload.name.rsplit('.', 1)[-1].lower()
+            if extension not in ('csv', 'json'):
+                raise ValidationError("Choose a format or upload a .csv or .json file.")
+            cleaned_data['format'] = extension
+        return cleaned_data
+
 class UserRegistrationForm(UserCreationForm):
     email = forms.EmailField(required=True)
     first_name = forms.CharField(max_length=30, required=False, help_text='Optional.')
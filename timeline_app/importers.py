@@ -0,0 +1,207 @@
+"""Bulk import of milestones from CSV or JSON files.
+
+Each record has a ``name`` and ``due_date`` and optionally a ``key``,
+``start_date``, ``status``, ``description`` and ``dependencies``. Dependencies
+refer to other records of the same file by ``key`` or ``name``, or to
+milestones already in the project by name. In CSV files they are separated
+by ``;``. All records are validated in memory before anything is written.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from django.db import transaction
+
+from .closure import rebuild_project_closure
+from .models import Milestone
+from .rollups import rebuild_project_rollups
+from .view_cache import invalidate_projects
+from .scheduling import DependencyCycleError, topological_order
+
+class MilestoneImportError(Exception):
+    """Raised when an import file is invalid; ``errors`` lists every problem found."""
+
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+def parse_milestone_file(data, format_type):
+    """Parse CSV or JSON bytes/text into a list of record dicts."""
+    if isinstance(data, bytes):
+        try:
+            data = data.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise MilestoneImportError(["The file must be UTF-8 encoded."])
+
+    if format_type == 'json':
+        try:
+            records = json.loads(data)
+        except ValueError as e:
+            raise MilestoneImportError([f"Invalid JSON: {e}"])
+        if isinstance(records, dict):
+            records = records.get('milestones')
+        if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+            raise MilestoneImportError(["Expected a list of milestone objects."])
+        return records
+
+    if format_type == 'csv':
+        reader = csv.DictReader(io.StringIO(data))
+        missing = {'name', 'due_date'} - set(reader.fieldnames or [])
+        if missing:
+            raise MilestoneImportError([f"Missing CSV column(s): {', '.join(sorted(missing))}"])
+        records = []
+        for row in reader:
+            row = {k.strip(): (v or '').strip() for k, v in row.items() if k}
+            row['dependencies'] = [d.strip() for d in row.get('dependencies', '').split(';') if d.strip()]
+            records.append(row)
+        return records
+
+    raise MilestoneImportError([f"Unknown import format: {format_type}"])
+
+
+TEXT_FIELDS = ('key', 'name', 'start_date', 'due_date', 'status', 'description')
+
+
+def _is_text(value):
+    """Return True for the values a text field can hold: strings, numbers or nothing."""
+    return value is None or (isinstance(value, (str, int, float)) and not isinstance(value, bool))
+
+
+def _parse_date(value):
+    if not value:
+        return None
+    return datetime.strptime(str(value), '%Y-%m-%d').date()
+
+
+def import_milestones(project, records):
+    """Validate records against the project and insert them in bulk.
+
+    Milestones are written with one ``bulk_create`` and their dependencies
+    with one bulk insert into the through table, followed by a rebuild of the
+    project's dependency closure. Raises MilestoneImportError listing every
+    invalid record; nothing is written in that case. Returns the created
+    milestones.
+    """
+    errors = []
+    statuses = dict(Milestone.STATUS_CHOICES)
+    milestones = []
+    keys = {}  # key -> position in milestones
+    names = {}  # name -> position in milestones, None if shared by several records
+
+    for line, record in enumerate(records, start=1):
+        # JSON records can hold lists, objects or booleans where text is expected
+        invalid = [field for field in TEXT_FIELDS if not _is_text(record.get(field))]
+        if invalid:
+            errors.append(f"Record {line}: {', '.join(invalid)} must be text")
+            continue
+        dependencies = record.get('dependencies') or []
+        if isinstance(dependencies, str):
+            dependencies = [d.strip() for d in dependencies.split(';') if d.strip()]
+        if not isinstance(dependencies, list) or not all(d is not None and _is_text(d) for d in dependencies):
+            errors.append(f"Record {line}: dependencies must be a list of keys or names")
+            continue
+
+        name = str(record.get('name') or '').strip()
+        label = f"Record {line}" + (f" ({name})" if name else '')
+        if not name:
+            errors.append(f"{label}: name is required")
+            continue
+        try:
+            due_date = _parse_date(record.get('due_date'))
+            start_date = _parse_date(record.get('start_date')) or due_date
+        except ValueError:
+            errors.append(f"{label}: dates must use the YYYY-MM-DD format")
+            continue
+        if due_date is None:
+            errors.append(f"{label}: due_date is required")
+            continue
+        if start_date > due_date:
+            errors.append(f"{label}: start date cannot be after due date")
+        if start_date < project.start_date or due_date > project.end_date:
+            errors.append(f"{label}: dates must be within the project timeframe")
+        status = str(record.get('status') or 'pending')
+        if status not in statuses:
+            errors.append(f"{label}: unknown status '{status}'")
+
+        key = str(record.get('key') or '').strip()
+        if key:
+            if key in keys:
+                errors.append(f"{label}: duplicate key '{key}'")
+            keys[key] = len(milestones)
+        # A name shared by several records can only be referenced through keys
+        names[name] = None if name in names else len(milestones)
+
+        milestones.append(Milestone(
+            project=project,
+            name=name,
+            start_date=start_date,
+            due_date=due_date,
+            duration=(due_date - start_date).days + 1,
+            status=status,
+            description=str(record.get('description') or ''),
+        ))
+        milestones[-1]._import_dependencies = dependencies
+
+    if errors:
+        raise MilestoneImportError(errors)
+
+    # Resolve dependencies to positions in the file or to existing milestones
+    existing = {}
+    for milestone_id, name in Milestone.objects.filter(project=project).values_list('id', 'name'):
+        existing[name] = None if name in existing else milestone_id
+
+    predecessors = [[] for _ in milestones]
+    successors = [[] for _ in milestones]
+    existing_dependencies = [[] for _ in milestones]
+    for position, milestone in enumerate(milestones):
+        for reference in milestone._import_dependencies:
+            reference = str(reference)
+            # A reference that is one record's key and another record's name is ambiguous
+            if reference in keys and names.get(reference, keys[reference]) == keys[reference]:
+                target = keys[reference]
+            elif reference not in keys and names.get(reference) is not None:
+                target = names[reference]
+            else:
+                target = None
+            if target is not None:
+                predecessors[position].append(target)
+                successors[target].append(position)
+            elif reference in keys or reference in names or existing.get(reference, 0) is None:
+                errors.append(f"{milestone.name}: dependency '{reference}' is ambiguous, use a key")
+            elif reference in existing:
+                existing_dependencies[position].append(existing[reference])
+            else:
+                errors.append(f"{milestone.name}: unknown dependency '{reference}'")
+
+    if errors:
+        raise MilestoneImportError(errors)
+
+    try:
+        topological_order({'predecessors': predecessors, 'successors': successors})
+    except DependencyCycleError:
+        raise MilestoneImportError(["The dependencies in the file contain a cycle."])
+
+    Through = Milestone.dependencies.through
+    with transaction.atomic():
+        Milestone.objects.bulk_create(milestones, batch_size=1000)
+        edges = []
+        for position, milestone in enumerate(milestones):
+            edges.extend(
+                Through(from_milestone_id=milestone.id, to_milestone_id=milestones[pred].id)
+                for pred in predecessors[position]
+            )
+            edges.extend(
+                Through(from_milestone_id=milestone.id, to_milestone_id=dependency_id)
+                for dependency_id in existing_dependencies[position]
+            )
+        Through.objects.bulk_create(edges, batch_size=1000)
+        # bulk_create bypasses the signals that maintain the closure, the analytics rollups
+        # and the cached views
+        if edges:
+            rebuild_project_closure(project)
+        rebuild_project_rollups([project.id])
+        invalidate_projects([project.id])
+
+    return milestones
@@ -1,10 +1,104 @@
 # timeline_app/management/commands/check_milestones.py
-from django.core.management.base import BaseCommand
-from timeline_app.utils import check_upcoming_milestones
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+from timeline_app.utils import check_milestone_shard, project_partitions
 
 class Command(BaseCommand):
     help = 'Check for upcoming milestones and create notifications'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of processes to split the check across')
+        parser.add_argument('--shard', default='1/1',
+                            help='Only check shard i of N (e.g. 2/4), to spread the check across hosts')
+        parser.add_argument('--daemon', action='store_true',
+                            help='Keep running and re-check milestones changed since the previous check')
+        parser.add_argument('--interval', type=float, default=300,
+                            help='Seconds between checks in daemon mode (default: 300)')
+        parser.add_argument('--overlap', type=float, default=600,
+                            help='Seconds each daemon check reaches back before the previous one, to '
+                                 'catch changes that committed while it ran (default: 600)')
+
+    def parse_shard(self, value):
+        try:
+            index, count = (int(part) for part in value.split('/'))
+        except ValueError:
+            raise CommandError(f"Invalid --shard '{value}', expected i/N")
+        if count < 1 or not 1 <= index <= count:
+            raise CommandError(f"Invalid --shard '{value}', i must be between 1 and N")
+        return index, count
+
     def handle(self, *args, **options):
-        check_upcoming_milestones()
-        self.stdout.write(self.style.SUCCESS('Successfully checked milestones'))
\ No newline at end of file
+        workers = options['workers']
+        if workers < 1:
+            raise CommandError('--workers must be at least 1')
+        self.workers = workers
+        self.shard = self.parse_shard(options['shard'])
+        self.executor = None
+
+        if workers > 1:
+            import django
+            from concurrent.futures import ProcessPoolExecutor
+            from django.db import connections
+
+            # Forked workers must not share the parent's connections; each opens its own
+            connections.close_all()
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+
+        try:
+            if options['daemon']:
+                self.run_daemon(options['interval'], timedelta(seconds=options['overlap']))
+            else:
+                self.run_sweep()
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+
+    def run_daemon(self, interval, overlap):
+        """Check on every tick, only looking at milestones changed since the previous tick.
+
+        A full check runs on the first tick and whenever the date changes, since
+        milestones also become due by the calendar moving on, not only by edits.
+        ``updated_at`` is stamped before a write commits, so every tick also
+        reaches ``overlap`` back before the previous one started.
+        """
+        watermark = None
+        checked_day = None
+        try:
+            while True:
+                close_old_connections()
+                started = timezone.now()
+                today = datetime.now().date()
+                self.run_sweep(changed_since=watermark if today == checked_day else None)
+                watermark, checked_day = started - overlap, today
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped checking milestones')
+
+    def run_sweep(self, changed_since=None):
+        index, count = self.shard
+
+        # Partitions are residues of the project id, so each project is checked by exactly one worker
+        partitions = project_partitions(index, count, self.workers)
+
+        if self.executor is None:
+            results = [check_milestone_shard(p, changed_since) for p in partitions]
+        else:
+            results = list(self.executor.map(check_milestone_shard, partitions, [changed_since] * len(partitions)))
+
+        for number, result in enumerate(results, start=1):
+            remainder, modulus = result['partition']
+            self.stdout.write(
+                f"Partition {number}/{len(results)} (project id % {modulus} = {remainder}): "
+                f"{result['created']} notification(s) in {result['seconds']:.2f}s"
+            )
+
+        created = sum(result['created'] for result in results)
+        scope = 'changed milestones' if changed_since else 'milestones'
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully checked {scope} for shard {index}/{count} ({created} notification(s) created)'
+        ))
@@ -0,0 +1,35 @@
+# timeline_app/management/commands/import_milestones.py
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from timeline_app.models import Project
+from timeline_app.importers import parse_milestone_file, import_milestones, MilestoneImportError
+
+class Command(BaseCommand):
+    help = 'Import milestones into a project from a CSV or JSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('project_id', type=int)
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'json'],
+                            help='File format (defaults to the file extension)')
+
+    def handle(self, *args, **options):
+        try:
+            project = Project.objects.get(id=options['project_id'])
+        except Project.DoesNotExist:
+            raise CommandError(f"Project {options['project_id']} does not exist")
+
+        format_type = options['format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        try:
+            with open(options['path'], 'rb') as f:
+                records = parse_milestone_file(f.read(), format_type)
+            milestones = import_milestones(project, records)
+        except OSError as e:
+            raise CommandError(str(e))
+        except MilestoneImportError as e:
+            raise CommandError("Nothing was imported:\n" + "\n".join(e.errors))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {len(milestones)} milestone(s) into '{project.name}'"
+        ))
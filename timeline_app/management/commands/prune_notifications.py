@@ -0,0 +1,68 @@
+# timeline_app/management/commands/prune_notifications.py
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from timeline_app.models import Notification
+from timeline_app.notifications import adjust_unread_counts
+
+class Command(BaseCommand):
+    help = 'Delete old read notifications and repeated milestone reminders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.NOTIFICATION_RETENTION_DAYS,
+                            help='Delete read notifications older than this many days')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of rows deleted per transaction')
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days cannot be negative')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        expired = Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+
+        # Only the newest reminder per user and milestone is worth keeping
+        newer_reminder = Notification.objects.filter(
+            notification_type='milestone_due',
+            user=OuterRef('user'),
+            milestone=OuterRef('milestone'),
+            id__gt=OuterRef('id'),
+        )
+        repeated = Notification.objects.filter(notification_type='milestone_due').filter(Exists(newer_reminder))
+
+        removed = self.prune('expired', expired, options['batch_size'])
+        removed += self.prune('repeated reminder', repeated, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} notification(s)'))
+
+    def prune(self, label, queryset, batch_size):
+        """Delete the rows of ``queryset`` in batches, each in its own short transaction."""
+        total = 0
+        batch = 0
+        while True:
+            started = time.monotonic()
+            with transaction.atomic():
+                rows = list(queryset.order_by('id').values_list('id', 'user_id', 'is_read')[:batch_size])
+                if not rows:
+                    break
+                # Nothing references notifications and they have no delete signals, so
+                # Django deletes the rows without loading them; the unread counters are
+                # adjusted here in bulk instead
+                Notification.objects.filter(id__in=[row[0] for row in rows]).delete()
+                adjust_unread_counts({
+                    user_id: -count
+                    for user_id, count in Counter(user_id for _, user_id, is_read in rows if not is_read).items()
+                })
+            batch += 1
+            total += len(rows)
+            self.stdout.write(
+                f"Batch {batch}: removed {len(rows)} {label} notification(s) in {time.monotonic() - started:.2f}s"
+            )
+        return total
@@ -0,0 +1,59 @@
+# timeline_app/management/commands/rebuild_rollups.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from timeline_app.models import MilestoneDueRollup, ProjectCreationRollup, ProjectRollup
+from timeline_app.rollups import (
+    COUNT_FIELDS, compute_creation_rollups, compute_project_rollups, refresh_project_rollups,
+)
+
+class Command(BaseCommand):
+    help = 'Recompute the analytics rollup tables from scratch and report any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Only report drift, and exit with an error if there is any')
+
+    def handle(self, *args, **options):
+        project_rollups, due_rollups = compute_project_rollups()
+        creation_rollups = compute_creation_rollups()
+
+        # Bring the stored due-date buckets up to today before comparing
+        stored = list(ProjectRollup.objects.all())
+        refresh_project_rollups(stored)
+
+        drift = {
+            'project': self.compare(
+                {r.project_id: tuple(getattr(r, f) for f in COUNT_FIELDS) for r in project_rollups},
+                {r.project_id: tuple(getattr(r, f) for f in COUNT_FIELDS) for r in stored},
+            ),
+            'due date': self.compare(
+                {(r.project_id, r.due_date): (r.total, r.open) for r in due_rollups},
+                {(r.project_id, r.due_date): (r.total, r.open)
+                 for r in MilestoneDueRollup.objects.exclude(total=0)},
+            ),
+            'project creation': self.compare(
+                {(r.user_id, r.month): r.count for r in creation_rollups},
+                {(r.user_id, r.month): r.count for r in ProjectCreationRollup.objects.exclude(count=0)},
+            ),
+        }
+        for table, rows in drift.items():
+            self.stdout.write(f"{table.capitalize()} rollups: {rows} row(s) out of date")
+
+        if options['verify']:
+            if any(drift.values()):
+                raise CommandError('The analytics rollups have drifted; run rebuild_rollups to fix them')
+            self.stdout.write(self.style.SUCCESS('The analytics rollups are up to date'))
+            return
+
+        with transaction.atomic():
+            ProjectRollup.objects.all().delete()
+            MilestoneDueRollup.objects.all().delete()
+            ProjectCreationRollup.objects.all().delete()
+            ProjectRollup.objects.bulk_create(project_rollups, batch_size=1000)
+            MilestoneDueRollup.objects.bulk_create(due_rollups, batch_size=1000)
+            ProjectCreationRollup.objects.bulk_create(creation_rollups, batch_size=1000)
+        self.stdout.write(self.style.SUCCESS('Rebuilt the analytics rollups'))
+
+    def compare(self, expected, stored):
+        """Count the keys whose stored value differs from the expected one."""
+        return sum(1 for key in expected.keys() | stored.keys() if expected.get(key) != stored.get(key))
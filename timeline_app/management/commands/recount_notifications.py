@@ -0,0 +1,32 @@
+# timeline_app/management/commands/recount_notifications.py
+from django.core.management.base import BaseCommand, CommandError
+from timeline_app.models import NotificationCounter
+from timeline_app.notifications import count_unread, reset_unread_counts
+
+class Command(BaseCommand):
+    help = 'Recount the unread notifications of every user and report any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Only report drift, and exit with an error if there is any')
+
+    def handle(self, *args, **options):
+        actual = count_unread()
+        stored = dict(NotificationCounter.objects.values_list('user_id', 'unread'))
+
+        # Users without a counter get one with the right count the first time it is read
+        drifted = {
+            user_id: actual.get(user_id, 0)
+            for user_id, unread in stored.items()
+            if unread != actual.get(user_id, 0)
+        }
+        self.stdout.write(f"Unread counters: {len(drifted)} out of date")
+
+        if options['verify']:
+            if drifted:
+                raise CommandError('The unread counters have drifted; run recount_notifications to fix them')
+            self.stdout.write(self.style.SUCCESS('The unread counters are up to date'))
+            return
+
+        reset_unread_counts(drifted)
+        self.stdout.write(self.style.SUCCESS(f'Recounted {len(drifted)} unread counter(s)'))
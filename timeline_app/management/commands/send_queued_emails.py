@@ -0,0 +1,49 @@
+# timeline_app/management/commands/send_queued_emails.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from timeline_app.outbox import DEFAULT_BATCH_SIZE, send_queued_emails
+
+class Command(BaseCommand):
+    help = 'Send the emails waiting in the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Number of emails sent over one connection')
+        parser.add_argument('--daemon', action='store_true',
+                            help='Keep running and send new emails as they are queued')
+        parser.add_argument('--interval', type=float, default=10,
+                            help='Seconds between checks of the outbox in daemon mode (default: 10)')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        if not options['daemon']:
+            self.drain(options['batch_size'])
+            return
+
+        try:
+            while True:
+                close_old_connections()
+                self.drain(options['batch_size'])
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped sending emails')
+
+    def drain(self, batch_size):
+        """Send batches until no email is due."""
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_queued_emails(batch_size)
+            total_sent += sent
+            total_failed += failed
+            # Failed emails are rescheduled, so a short batch means the queue is empty
+            if sent + failed < batch_size:
+                break
+
+        if total_sent or total_failed:
+            self.stdout.write(self.style.SUCCESS(
+                f'Sent {total_sent} email(s), {total_failed} failed'
+            ))
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:51
+
+import django.db.models.deletion
+from collections import defaultdict, deque
+from django.db import migrations, models
+
+
+def build_milestone_closure(apps, schema_editor):
+    """Populate the closure table from the existing dependency edges.
+
+    Milestones that are part of a dependency cycle are left out.
+    """
+    Milestone = apps.get_model('timeline_app', 'Milestone')
+    MilestoneClosure = apps.get_model('timeline_app', 'MilestoneClosure')
+
+    predecessors = defaultdict(list)
+    successors = defaultdict(list)
+    in_degree = defaultdict(int)
+    for dependent_id, dependency_id in Milestone.dependencies.through.objects.values_list(
+        'from_milestone_id', 'to_milestone_id'
+    ):
+        predecessors[dependent_id].append(dependency_id)
+        successors[dependency_id].append(dependent_id)
+        in_degree[dependent_id] += 1
+
+    nodes = set(predecessors) | set(successors)
+    queue = deque(node for node in nodes if in_degree[node] == 0)
+    counts = {}
+    rows = []
+    while queue:
+        node = queue.popleft()
+        # Only the shortest chain of each pair is stored, since counting every
+        # chain grows exponentially with the depth of the graph
+        depths = {}
+        for pred in predecessors[node]:
+            for ancestor, depth in [(pred, 0)] + list(counts[pred].items()):
+                if depth + 1 < depths.get(ancestor, depth + 2):
+                    depths[ancestor] = depth + 1
+        counts[node] = depths
+        rows.extend(
+            MilestoneClosure(ancestor_id=ancestor, descendant_id=node, depth=depth)
+            for ancestor, depth in depths.items()
+        )
+        for succ in successors[node]:
+            in_degree[succ] -= 1
+            if in_degree[succ] == 0:
+                queue.append(succ)
+
+    MilestoneClosure.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timeline_app', '0005_initialize_milestone_start_dates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MilestoneClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('paths', models.PositiveIntegerField(default=1)),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='timeline_app.milestone')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='timeline_app.milestone')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'ancestor'], name='milestone_closure_desc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant', 'depth'), name='unique_milestone_closure_path')],
+            },
+        ),
+        migrations.RunPython(build_milestone_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timeline_app', '0006_milestoneclosure'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='milestone',
+            index=models.Index(fields=['project', 'start_date', 'due_date'], name='milestone_window_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def count_unread_notifications(apps, schema_editor):
+    """Create a counter for every user that has unread notifications."""
+    Notification = apps.get_model('timeline_app', 'Notification')
+    NotificationCounter = apps.get_model('timeline_app', 'NotificationCounter')
+
+    unread = Notification.objects.filter(is_read=False).values('user_id').annotate(unread=models.Count('id'))
+    NotificationCounter.objects.bulk_create(
+        (NotificationCounter(user_id=row['user_id'], unread=row['unread']) for row in unread.order_by()),
+        batch_size=1000,
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('timeline_app', '0008_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_unread_notifications, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timeline_app', '0010_notification_inbox_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='milestone',
+            index=models.Index(fields=['project', 'status'], name='milestone_project_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='milestone',
+            index=models.Index(fields=['due_date'], name='milestone_due_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['user', 'is_archived'], name='project_owner_archived_idx'),
+        ),
+    ]
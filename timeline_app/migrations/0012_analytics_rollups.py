@@ -0,0 +1,107 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:29
+
+import django.db.models.deletion
+from collections import defaultdict
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+OPEN_STATUSES = ('pending', 'in_progress', 'delayed')
+
+
+def build_analytics_rollups(apps, schema_editor):
+    """Populate the rollup tables from the existing projects and milestones."""
+    Project = apps.get_model('timeline_app', 'Project')
+    Milestone = apps.get_model('timeline_app', 'Milestone')
+    ProjectRollup = apps.get_model('timeline_app', 'ProjectRollup')
+    MilestoneDueRollup = apps.get_model('timeline_app', 'MilestoneDueRollup')
+    ProjectCreationRollup = apps.get_model('timeline_app', 'ProjectCreationRollup')
+
+    today = timezone.now().date()
+    rollups = {pid: ProjectRollup(project_id=pid, as_of=today) for pid in Project.objects.values_list('id', flat=True)}
+    due = defaultdict(lambda: [0, 0])
+    for row in Milestone.objects.order_by().values('project_id', 'due_date', 'status').annotate(count=models.Count('id')):
+        rollup = rollups[row['project_id']]
+        count, due_date, status = row['count'], row['due_date'], row['status']
+        rollup.total += count
+        if hasattr(rollup, status):
+            setattr(rollup, status, getattr(rollup, status) + count)
+        bucket = 'past' if due_date < today else 'today' if due_date == today else 'upcoming'
+        setattr(rollup, bucket, getattr(rollup, bucket) + count)
+        if due_date < today and status in OPEN_STATUSES:
+            rollup.overdue += count
+        due[(row['project_id'], due_date)][0] += count
+        due[(row['project_id'], due_date)][1] += count if status in OPEN_STATUSES else 0
+    ProjectRollup.objects.bulk_create(rollups.values(), batch_size=1000)
+    MilestoneDueRollup.objects.bulk_create(
+        (MilestoneDueRollup(project_id=pid, due_date=day, total=total, open=open_count)
+         for (pid, day), (total, open_count) in due.items()),
+        batch_size=1000,
+    )
+
+    counts = defaultdict(int)
+    month = TruncMonth('created_at', output_field=models.DateField())
+    for row in Project.objects.annotate(month=month).values('user_id', 'month').annotate(count=models.Count('id')):
+        counts[(row['user_id'], row['month'])] += row['count']
+    month = TruncMonth('project__created_at', output_field=models.DateField())
+    for row in (Project.collaborators.through.objects.annotate(month=month)
+                .values('user_id', 'month').annotate(count=models.Count('id'))):
+        counts[(row['user_id'], row['month'])] += row['count']
+    ProjectCreationRollup.objects.bulk_create(
+        (ProjectCreationRollup(user_id=user_id, month=month, count=count) for (user_id, month), count in counts.items()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timeline_app', '0011_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectRollup',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='timeline_app.project')),
+                ('total', models.IntegerField(default=0)),
+                ('pending', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('delayed', models.IntegerField(default=0)),
+                ('past', models.IntegerField(default=0)),
+                ('today', models.IntegerField(default=0)),
+                ('upcoming', models.IntegerField(default=0)),
+                ('overdue', models.IntegerField(default=0)),
+                ('as_of', models.DateField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MilestoneDueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField()),
+                ('total', models.IntegerField(default=0)),
+                ('open', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='due_rollups', to='timeline_app.project')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('project', 'due_date'), name='unique_milestone_due_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectCreationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_creation_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'month'), name='unique_project_creation_rollup')],
+            },
+        ),
+        migrations.RunPython(build_analytics_rollups, migrations.RunPython.noop),
+    ]
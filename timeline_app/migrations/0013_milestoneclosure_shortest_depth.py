@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:10
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def keep_shortest_chains(apps, schema_editor):
+    """Keep one closure row per pair, the one with the shortest depth."""
+    MilestoneClosure = apps.get_model('timeline_app', 'MilestoneClosure')
+    # Rows are only duplicated per pair for graphs with several chain lengths,
+    # so walking the pairs that have a longer row is cheap
+    for pair in MilestoneClosure.objects.values('ancestor_id', 'descendant_id').annotate(
+        min_depth=Min('depth'), rows=Count('id')
+    ).filter(rows__gt=1):
+        MilestoneClosure.objects.filter(
+            ancestor_id=pair['ancestor_id'], descendant_id=pair['descendant_id'], depth__gt=pair['min_depth']
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timeline_app', '0012_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='milestoneclosure',
+            name='unique_milestone_closure_path',
+        ),
+        migrations.RunPython(keep_shortest_chains, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='milestoneclosure',
+            name='paths',
+        ),
+        migrations.AddConstraint(
+            model_name='milestoneclosure',
+            constraint=models.UniqueConstraint(fields=('ancestor', 'descendant'), name='unique_milestone_closure_pair'),
+        ),
+    ]
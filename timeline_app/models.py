@@ -2,6 +2,7 @@
 
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class Project(models.Model):
     name = models.CharField(max_length=200)
@@ -14,6 +15,12 @@ class Project(models.Model):
     is_archived = models.BooleanField(default=False)
     description = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Dashboard and archive lists
+            models.Index(fields=['user', 'is_archived'], name='project_owner_archived_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -36,9 +43,80 @@ class Milestone(models.Model):
     status = models.CharField(max_length=100, choices=STATUS_CHOICES, default='pending')
     dependencies = models.ManyToManyField('self', symmetrical=False, blank=True, related_name='dependent_milestones')
 
+    class Meta:
+        indexes = [
+            # Date-windowed Gantt queries
+            models.Index(fields=['project', 'start_date', 'due_date'], name='milestone_window_idx'),
+            # Status counts per project
+            models.Index(fields=['project', 'status'], name='milestone_project_status_idx'),
+            # Due-date reminder sweep
+            models.Index(fields=['due_date'], name='milestone_due_date_idx'),
+        ]
+
     def __str__(self):
         return self.name
-    
+
+class MilestoneClosure(models.Model):
+    """Transitive closure of Milestone.dependencies.
+
+    One row per (ancestor, descendant) pair where the descendant depends on the
+    ancestor, with ``depth`` the length of the shortest dependency chain
+    between them. Kept up to date by the signal handlers in ``signals.py``.
+    """
+    ancestor = models.ForeignKey(Milestone, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Milestone, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='unique_milestone_closure_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'ancestor'], name='milestone_closure_desc_idx'),
+        ]
+
+class ProjectRollup(models.Model):
+    """Precomputed milestone counts of a project, kept up to date by ``rollups.py``.
+
+    The due-date buckets (past, today, upcoming, overdue) are relative to
+    ``as_of`` and are moved forward from ``MilestoneDueRollup`` when read on a
+    later day.
+    """
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name='rollup')
+    total = models.IntegerField(default=0)
+    pending = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    delayed = models.IntegerField(default=0)
+    past = models.IntegerField(default=0)
+    today = models.IntegerField(default=0)
+    upcoming = models.IntegerField(default=0)
+    overdue = models.IntegerField(default=0)
+    as_of = models.DateField()
+
+class MilestoneDueRollup(models.Model):
+    """Number of milestones of a project due on one date, and how many of them are not completed."""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='due_rollups')
+    due_date = models.DateField()
+    total = models.IntegerField(default=0)
+    open = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'due_date'], name='unique_milestone_due_rollup'),
+        ]
+
+class ProjectCreationRollup(models.Model):
+    """Number of projects a user can access, by the month they were created in."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='project_creation_rollups')
+    month = models.DateField(help_text="First day of the month")
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month'], name='unique_project_creation_rollup'),
+        ]
+
 class Notification(models.Model):
     NOTIFICATION_TYPES = (
         ('milestone_due', 'Milestone Due'),
@@ -55,4 +133,41 @@ class Notification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            # Keyset-paginated inbox, all notifications and unread only
+            models.Index(fields=['user', 'created_at', 'id'], name='notification_inbox_idx'),
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notification_unread_idx'),
+        ]
+
+class NotificationCounter(models.Model):
+    """Number of unread notifications of a user, kept up to date by ``notifications.py``."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter')
+    unread = models.IntegerField(default=0)
+
+class OutgoingEmail(models.Model):
+    """An email waiting to be sent by the ``send_queued_emails`` worker."""
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outgoing_email_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {self.recipient}"
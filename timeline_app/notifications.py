@@ -0,0 +1,197 @@
+"""Creation of notifications for many recipients at once.
+
+Every place that produces notifications goes through ``notify``, which writes
+them with one ``bulk_create``. When ``settings.NOTIFICATION_FANOUT_DEFERRED``
+is set, the insert is handed to a background thread once the surrounding
+transaction commits, so the request that caused it can return right away.
+
+Each user's unread count is kept in ``NotificationCounter`` and cached, so
+pages don't have to count notifications. Creating notifications through
+``notify`` or ``Notification.objects.create`` (see ``signals.py``) and marking
+them read through ``mark_notifications_read`` keep the counter in step. Code
+that deletes notifications calls ``uncount_notifications`` first; projects and
+milestones do so from their ``pre_delete`` handlers, which leaves Django free
+to delete the cascaded notifications without loading them, and so does the
+admin. ``manage.py recount_notifications`` repairs counters that drifted
+because of writes that bypassed these helpers.
+"""
+import logging
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F
+
+from .models import Notification, NotificationCounter
+
+NOTIFICATION_BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+_fanout_executor = None
+
+
+def get_fanout_executor():
+    """Return the single background thread that performs deferred fan-outs."""
+    global _fanout_executor
+    if _fanout_executor is None:
+        import atexit
+        from concurrent.futures import ThreadPoolExecutor
+        _fanout_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='notification-fanout')
+        atexit.register(_fanout_executor.shutdown)
+    return _fanout_executor
+
+
+def _unread_cache_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def _create_missing_counters(user_ids):
+    """Create counters for users that don't have one yet, from their current unread notifications."""
+    missing = set(user_ids) - set(
+        NotificationCounter.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True)
+    )
+    if not missing:
+        return
+    counts = dict(
+        Notification.objects.filter(user_id__in=missing, is_read=False)
+        .order_by().values('user_id').annotate(unread=Count('id')).values_list('user_id', 'unread')
+    )
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=user_id, unread=counts.get(user_id, 0)) for user_id in missing],
+        ignore_conflicts=True,
+    )
+
+
+def adjust_unread_counts(deltas):
+    """Add ``{user_id: delta}`` to the users' unread counters.
+
+    Users that get the same delta are updated together with one ``F()`` update.
+    Must be called after the notifications themselves were written.
+    """
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(user_id)
+
+    for delta, user_ids in by_delta.items():
+        updated = NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=F('unread') + delta)
+        if updated < len(user_ids):
+            # A new counter counts the notifications that are already written
+            _create_missing_counters(user_ids)
+
+    keys = [_unread_cache_key(user_id) for user_ids in by_delta.values() for user_id in user_ids]
+    if keys:
+        # Clear again after commit in case another request cached the old value meanwhile
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def uncount_notifications(notifications):
+    """Take the unread notifications of a queryset that is about to be deleted off the counters."""
+    counts = notifications.filter(is_read=False).order_by().values('user_id').annotate(unread=Count('id'))
+    adjust_unread_counts({row['user_id']: -row['unread'] for row in counts})
+
+
+def count_unread():
+    """Count every user's unread notifications from scratch. Returns ``{user_id: unread}``."""
+    return dict(
+        Notification.objects.filter(is_read=False).order_by().values('user_id')
+        .annotate(unread=Count('id')).values_list('user_id', 'unread')
+    )
+
+
+def reset_unread_counts(counts):
+    """Overwrite the existing unread counters of ``{user_id: unread}`` and clear their cached counts."""
+    counters = NotificationCounter.objects.in_bulk(list(counts))
+    for user_id, counter in counters.items():
+        counter.unread = counts[user_id]
+    NotificationCounter.objects.bulk_update(list(counters.values()), ['unread'], batch_size=1000)
+
+    keys = [_unread_cache_key(user_id) for user_id in counts]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def unread_count(user):
+    """Return the number of unread notifications of ``user``, from the cache when possible."""
+    key = _unread_cache_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = NotificationCounter.objects.filter(user_id=user.pk).values_list('unread', flat=True).first()
+        if count is None:
+            _create_missing_counters([user.pk])
+            count = NotificationCounter.objects.get(user_id=user.pk).unread
+        cache.set(key, count, settings.NOTIFICATION_COUNT_CACHE_TIMEOUT)
+    return max(count, 0)
+
+
+def mark_notifications_read(user, notifications):
+    """Mark the unread notifications in a queryset as read. Returns how many changed."""
+    with transaction.atomic():
+        count = notifications.filter(user=user, is_read=False).update(is_read=True)
+        adjust_unread_counts({user.pk: -count})
+    return count
+
+
+def _insert_notifications(notifications):
+    Notification.objects.bulk_create(notifications, batch_size=NOTIFICATION_BATCH_SIZE)
+    adjust_unread_counts(Counter(n.user_id for n in notifications if not n.is_read))
+
+
+def _create_notifications(notifications):
+    try:
+        with transaction.atomic():
+            _insert_notifications(notifications)
+    except Exception:
+        # Nobody is waiting on a deferred fan-out, so the log is the only trace of what was dropped
+        logger.exception("Error creating %d notification(s)", len(notifications))
+    finally:
+        close_old_connections()
+
+
+def notify(notifications, defer=None):
+    """Save a list of unsaved Notification objects with one bulk insert.
+
+    ``defer`` overrides ``settings.NOTIFICATION_FANOUT_DEFERRED``. Returns the
+    number of notifications created or queued.
+    """
+    notifications = list(notifications)
+    if not notifications:
+        return 0
+
+    if defer is None:
+        defer = getattr(settings, 'NOTIFICATION_FANOUT_DEFERRED', False)
+
+    if defer:
+        # Only queue once the objects the notifications point at are committed
+        transaction.on_commit(lambda: get_fanout_executor().submit(_create_notifications, notifications))
+    else:
+        with transaction.atomic():
+            _insert_notifications(notifications)
+    return len(notifications)
+
+
+def notify_users(user_ids, notification_type, message, project=None, milestone=None, defer=None):
+    """Send the same notification to every user in ``user_ids``."""
+    return notify(
+        (
+            Notification(
+                user_id=user_id,
+                notification_type=notification_type,
+                message=message,
+                project=project,
+                milestone=milestone,
+            )
+            for user_id in user_ids
+        ),
+        defer=defer,
+    )
+
+
+def notify_collaborators(project, notification_type, message, milestone=None, defer=None):
+    """Send a notification to every collaborator of ``project``."""
+    user_ids = list(project.collaborators.values_list('id', flat=True))
+    return notify_users(user_ids, notification_type, message, project=project, milestone=milestone, defer=defer)
@@ -0,0 +1,117 @@
+"""Queued email delivery.
+
+Views call ``queue_email`` instead of sending mail inside the request. The
+``send_queued_emails`` command then delivers the queue in batches, reusing one
+backend connection per batch and retrying failed messages with exponential
+backoff until ``EMAIL_OUTBOX_MAX_ATTEMPTS`` is reached. Each batch is claimed
+before it is sent, so several workers can drain the queue at the same time
+without sending an email twice.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+DEFAULT_BATCH_SIZE = 50
+
+
+def queue_email(recipient, subject, body, html_body=''):
+    """Add an email to the outbox and return the OutgoingEmail row."""
+    return OutgoingEmail.objects.create(recipient=recipient, subject=subject, body=body, html_body=html_body)
+
+
+def retry_delay(attempts):
+    """Return how long to wait before the next attempt after ``attempts`` failures."""
+    return timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def _message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=None,  # Uses DEFAULT_FROM_EMAIL from settings
+        to=[email.recipient],
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def _record_failure(email, error, now):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = 'failed'
+    else:
+        email.next_attempt_at = now + retry_delay(email.attempts)
+
+
+def claim_queued_emails(batch_size, now):
+    """Claim up to ``batch_size`` due emails for this worker and return them.
+
+    The claimed rows are moved out of the due window for
+    ``EMAIL_OUTBOX_CLAIM_TIMEOUT`` seconds, so other workers skip them while
+    they are being sent and pick them up again if this worker dies.
+    """
+    claimed_until = now + timedelta(seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT)
+    due = OutgoingEmail.objects.filter(status='queued', next_attempt_at__lte=now)
+    with transaction.atomic():
+        # Rows locked by another worker are skipped; backends without row locks
+        # rely on the conditional update below instead
+        batch = list(due.select_for_update(skip_locked=True).order_by('next_attempt_at', 'id')[:batch_size])
+        if not batch:
+            return []
+        ids = [email.id for email in batch]
+        due.filter(id__in=ids).update(next_attempt_at=claimed_until)
+        claimed = set(
+            OutgoingEmail.objects.filter(id__in=ids, next_attempt_at=claimed_until).values_list('id', flat=True)
+        )
+    return [email for email in batch if email.id in claimed]
+
+
+def send_queued_emails(batch_size=DEFAULT_BATCH_SIZE):
+    """Claim one batch of due emails and send it over a single connection.
+
+    Returns a ``(sent, failed)`` pair, where ``failed`` counts the messages
+    that will be retried or were given up on.
+    """
+    now = timezone.now()
+    batch = claim_queued_emails(batch_size, now)
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        # The server is unreachable, so the whole batch is retried later
+        for email in batch:
+            _record_failure(email, e, now)
+        failed = len(batch)
+    else:
+        try:
+            for email in batch:
+                try:
+                    _message(email, connection).send()
+                except Exception as e:
+                    _record_failure(email, e, now)
+                    failed += 1
+                else:
+                    email.attempts += 1
+                    email.status = 'sent'
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+                    sent += 1
+        finally:
+            connection.close()
+
+    OutgoingEmail.objects.bulk_update(
+        batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+    )
+    return sent, failed
@@ -0,0 +1,102 @@
+"""PDF rendering for project exports.
+
+This module must not import Django models: ``render_pdf_file`` runs in a
+worker process of a ``ProcessPoolExecutor`` and only receives plain data.
+"""
+import base64
+import os
+import tempfile
+from datetime import timedelta
+from html import escape
+
+GANTT_ROWS_PER_CHART = 40
+GANTT_LABEL_WIDTH = 160
+GANTT_CHART_WIDTH = 460
+GANTT_ROW_HEIGHT = 16
+GANTT_HEADER_HEIGHT = 20
+
+STATUS_COLORS = {
+    'completed': '#28a745',
+    'in_progress': '#007bff',
+    'pending': '#ffc107',
+    'delayed': '#dc3545',
+}
+
+
+def _month_starts(start, end):
+    """Yield the first day of every month after ``start`` up to ``end``."""
+    month = start.replace(day=1)
+    while True:
+        month = (month + timedelta(days=32)).replace(day=1)
+        if month > end:
+            return
+        yield month
+
+
+def gantt_svg(project_start, project_end, milestones):
+    """Draw a Gantt chart of milestone dicts (name, start_date, due_date, status) as SVG."""
+    total_days = max((project_end - project_start).days + 1, 1)
+    day_width = GANTT_CHART_WIDTH / total_days
+    width = GANTT_LABEL_WIDTH + GANTT_CHART_WIDTH
+    height = GANTT_HEADER_HEIGHT + GANTT_ROW_HEIGHT * len(milestones)
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}">',
+        f'<rect x="{GANTT_LABEL_WIDTH}" y="0" width="{GANTT_CHART_WIDTH}" height="{height}" '
+        f'fill="none" stroke="#cccccc"/>',
+    ]
+
+    # Month grid lines and labels
+    for month in _month_starts(project_start, project_end):
+        x = GANTT_LABEL_WIDTH + (month - project_start).days * day_width
+        parts.append(f'<line x1="{x:.1f}" y1="0" x2="{x:.1f}" y2="{height}" stroke="#eeeeee"/>')
+        parts.append(f'<text x="{x + 2:.1f}" y="13" font-size="8" fill="#555555">{month:%b %Y}</text>')
+
+    for row, milestone in enumerate(milestones):
+        y = GANTT_HEADER_HEIGHT + row * GANTT_ROW_HEIGHT
+        start = max(milestone['start_date'], project_start)
+        end = min(milestone['due_date'], project_end)
+        x = GANTT_LABEL_WIDTH + (start - project_start).days * day_width
+        bar_width = max(((end - start).days + 1) * day_width, 2)
+        color = STATUS_COLORS.get(milestone['status'], STATUS_COLORS['pending'])
+        name = milestone['name'] if len(milestone['name']) <= 30 else milestone['name'][:29] + '…'
+
+        parts.append(f'<text x="2" y="{y + 11}" font-size="9">{escape(name)}</text>')
+        parts.append(
+            f'<rect x="{x:.1f}" y="{y + 3}" width="{bar_width:.1f}" height="{GANTT_ROW_HEIGHT - 6}" fill="{color}"/>'
+        )
+
+    parts.append('</svg>')
+    return ''.join(parts), width, height
+
+
+def gantt_charts(project_start, project_end, milestones):
+    """Split the Gantt chart into page-sized SVG images ready for an <img> tag."""
+    charts = []
+    for first in range(0, len(milestones), GANTT_ROWS_PER_CHART):
+        svg, width, height = gantt_svg(project_start, project_end, milestones[first:first + GANTT_ROWS_PER_CHART])
+        charts.append({
+            'src': 'data:image/svg+xml;base64,' + base64.b64encode(svg.encode('utf-8')).decode('ascii'),
+            'width': width,
+            'height': height,
+        })
+    return charts
+
+
+def render_pdf_file(html, path):
+    """Render HTML to a PDF file at ``path``, writing it atomically. Returns ``path``."""
+    from xhtml2pdf import pisa
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            result = pisa.CreatePDF(html, dest=output, encoding='utf-8')
+        if result.err:
+            raise RuntimeError(f"PDF rendering failed with {result.err} error(s)")
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
@@ -0,0 +1,223 @@
+"""Precomputed analytics counts.
+
+``ProjectRollup`` holds a project's milestone counts by status and by due-date
+bucket, ``MilestoneDueRollup`` the number of milestones due on each date, and
+``ProjectCreationRollup`` the number of projects each user can access by the
+month they were created in. The signal handlers in ``signals.py`` keep them up
+to date one change at a time; code that writes milestones in bulk calls
+``rebuild_project_rollups`` for the projects it touched instead.
+
+The due-date buckets move as days pass without any write, so they are stored
+relative to ``ProjectRollup.as_of`` and moved forward on read by
+``refresh_project_rollups``, which only looks at the dates in between.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, DateField, F, Q, Value, When
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Milestone, MilestoneDueRollup, Project, ProjectCreationRollup, ProjectRollup
+
+OPEN_STATUSES = ('pending', 'in_progress', 'delayed')
+STATUS_FIELDS = ('pending', 'in_progress', 'completed', 'delayed')
+BUCKET_FIELDS = ('past', 'today', 'upcoming', 'overdue')
+COUNT_FIELDS = ('total',) + STATUS_FIELDS + BUCKET_FIELDS
+
+
+def _today():
+    return timezone.now().date()
+
+
+def _month(created_at):
+    """Return the first day of the month ``created_at`` falls in, in the current time zone."""
+    if timezone.is_aware(created_at):
+        created_at = timezone.localtime(created_at)
+    return created_at.date().replace(day=1)
+
+
+def compute_project_rollups(project_ids=None, today=None):
+    """Compute rollups from the milestones of the given projects (all projects if None).
+
+    Returns a ``(project_rollups, due_rollups)`` pair of unsaved objects.
+    """
+    today = today or _today()
+    projects = Project.objects.all() if project_ids is None else Project.objects.filter(id__in=project_ids)
+    rollups = {pid: ProjectRollup(project_id=pid, as_of=today) for pid in projects.values_list('id', flat=True)}
+
+    milestones = Milestone.objects.all() if project_ids is None else Milestone.objects.filter(project_id__in=project_ids)
+    due = defaultdict(lambda: [0, 0])
+    for row in milestones.order_by().values('project_id', 'due_date', 'status').annotate(count=Count('id')):
+        rollup = rollups[row['project_id']]
+        count, due_date, status = row['count'], row['due_date'], row['status']
+        is_open = status in OPEN_STATUSES
+
+        rollup.total += count
+        if status in STATUS_FIELDS:
+            setattr(rollup, status, getattr(rollup, status) + count)
+        if due_date < today:
+            rollup.past += count
+            if is_open:
+                rollup.overdue += count
+        elif due_date == today:
+            rollup.today += count
+        else:
+            rollup.upcoming += count
+
+        entry = due[(row['project_id'], due_date)]
+        entry[0] += count
+        entry[1] += count if is_open else 0
+
+    due_rollups = [
+        MilestoneDueRollup(project_id=pid, due_date=due_date, total=total, open=open_count)
+        for (pid, due_date), (total, open_count) in due.items()
+    ]
+    return list(rollups.values()), due_rollups
+
+
+def compute_creation_rollups():
+    """Compute every user's project counts by creation month. Returns unsaved objects."""
+    month = TruncMonth('created_at', output_field=DateField())
+    counts = defaultdict(int)
+    for row in Project.objects.annotate(month=month).values('user_id', 'month').annotate(count=Count('id')):
+        counts[(row['user_id'], row['month'])] += row['count']
+
+    shared_month = TruncMonth('project__created_at', output_field=DateField())
+    for row in (Project.collaborators.through.objects.annotate(month=shared_month)
+                .values('user_id', 'month').annotate(count=Count('id'))):
+        counts[(row['user_id'], row['month'])] += row['count']
+
+    return [
+        ProjectCreationRollup(user_id=user_id, month=month, count=count)
+        for (user_id, month), count in counts.items()
+    ]
+
+
+def rebuild_project_rollups(project_ids, today=None):
+    """Recompute the rollups of some projects from their milestones. Returns the ProjectRollups."""
+    project_ids = list(project_ids)
+    rollups, due_rollups = compute_project_rollups(project_ids, today)
+    with transaction.atomic():
+        ProjectRollup.objects.filter(project_id__in=project_ids).delete()
+        MilestoneDueRollup.objects.filter(project_id__in=project_ids).delete()
+        ProjectRollup.objects.bulk_create(rollups, batch_size=1000)
+        MilestoneDueRollup.objects.bulk_create(due_rollups, batch_size=1000)
+    return rollups
+
+
+def start_project_rollup(project):
+    """Create the empty rollup of a new project."""
+    return ProjectRollup.objects.create(project=project, as_of=_today())
+
+
+def refresh_project_rollups(rollups, today=None):
+    """Move the due-date buckets of rollups computed on an earlier day forward to ``today``.
+
+    Only the MilestoneDueRollup rows between each rollup's ``as_of`` and today
+    are read. The rollup objects passed in are updated in place.
+    """
+    today = today or _today()
+    stale = [rollup for rollup in rollups if rollup.as_of < today]
+    if not stale:
+        return
+
+    with transaction.atomic():
+        locked = {
+            rollup.project_id: rollup
+            for rollup in ProjectRollup.objects.select_for_update().filter(
+                project_id__in=[rollup.project_id for rollup in stale], as_of__lt=today
+            )
+        }
+        if locked:
+            days = MilestoneDueRollup.objects.filter(
+                project_id__in=list(locked),
+                due_date__gte=min(rollup.as_of for rollup in locked.values()),
+                due_date__lte=today,
+            ).values_list('project_id', 'due_date', 'total', 'open')
+
+            due_today = defaultdict(int)
+            for project_id, due_date, total, open_count in days:
+                rollup = locked[project_id]
+                if due_date < rollup.as_of:
+                    continue
+                if due_date < today:
+                    if due_date > rollup.as_of:
+                        # Was upcoming, is now past
+                        rollup.upcoming -= total
+                        rollup.past += total
+                    rollup.overdue += open_count
+                else:
+                    rollup.upcoming -= total
+                    due_today[project_id] = total
+
+            for project_id, rollup in locked.items():
+                # What was due on the old day is now past
+                rollup.past += rollup.today
+                rollup.today = due_today[project_id]
+                rollup.as_of = today
+            ProjectRollup.objects.bulk_update(list(locked.values()), list(BUCKET_FIELDS) + ['as_of'])
+
+    for rollup in stale:
+        current = locked.get(rollup.project_id)
+        if current is not None:
+            for field in BUCKET_FIELDS + ('as_of',):
+                setattr(rollup, field, getattr(current, field))
+
+
+def project_rollups(project_ids, today=None):
+    """Return ``{project_id: ProjectRollup}`` for the given projects, current as of today."""
+    today = today or _today()
+    project_ids = set(project_ids)
+    rollups = {rollup.project_id: rollup for rollup in ProjectRollup.objects.filter(project_id__in=project_ids)}
+    missing = project_ids - set(rollups)
+    if missing:
+        rollups.update((rollup.project_id, rollup) for rollup in rebuild_project_rollups(missing, today))
+    refresh_project_rollups(list(rollups.values()), today)
+    return rollups
+
+
+def count_milestone(project_id, due_date, status, sign=1):
+    """Count (sign=1) or uncount (sign=-1) one milestone in its project's rollups."""
+    is_open = status in OPEN_STATUSES
+
+    def bucket(condition):
+        return Case(When(condition, then=Value(sign)), default=Value(0))
+
+    changes = {
+        'total': F('total') + sign,
+        'past': F('past') + bucket(Q(as_of__gt=due_date)),
+        'today': F('today') + bucket(Q(as_of=due_date)),
+        'upcoming': F('upcoming') + bucket(Q(as_of__lt=due_date)),
+    }
+    if status in STATUS_FIELDS:
+        changes[status] = F(status) + sign
+    if is_open:
+        changes['overdue'] = F('overdue') + bucket(Q(as_of__gt=due_date))
+
+    if not ProjectRollup.objects.filter(project_id=project_id).update(**changes):
+        if sign > 0:
+            # No rollup yet, so compute it including this milestone
+            rebuild_project_rollups([project_id])
+        return
+
+    updated = MilestoneDueRollup.objects.filter(project_id=project_id, due_date=due_date).update(
+        total=F('total') + sign, open=F('open') + (sign if is_open else 0)
+    )
+    if not updated and sign > 0:
+        MilestoneDueRollup.objects.create(project_id=project_id, due_date=due_date, total=1, open=int(is_open))
+
+
+def count_project_access(project, user_ids, sign=1):
+    """Count (sign=1) or uncount (sign=-1) a project for users in their monthly creation counts."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    month = _month(project.created_at)
+    rows = ProjectCreationRollup.objects.filter(user_id__in=user_ids, month=month)
+    if rows.update(count=F('count') + sign) < len(user_ids) and sign > 0:
+        existing = set(rows.values_list('user_id', flat=True))
+        ProjectCreationRollup.objects.bulk_create([
+            ProjectCreationRollup(user_id=user_id, month=month, count=sign)
+            for user_id in user_ids if user_id not in existing
+        ])
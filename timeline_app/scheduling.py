@@ -0,0 +1,221 @@
+"""Critical-path scheduling over ``Milestone.dependencies``.
+
+The schedule is computed in day offsets from ``project.start_date``. A
+milestone occupies ``duration`` days, so a milestone starting at offset 0
+with a duration of 3 finishes at offset 3 (exclusive). Milestones are never
+scheduled earlier than their planned start date, and never before all of the
+milestones they depend on have finished.
+"""
+from collections import deque
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Milestone
+from .rollups import rebuild_project_rollups
+from .view_cache import invalidate_projects
+
+
+class DependencyCycleError(ValueError):
+    """Raised when a project's milestone dependencies contain a cycle."""
+
+
+def planned_start(start_date, due_date, duration):
+    """Return the planned start date of a milestone, falling back to its due date."""
+    if start_date:
+        return start_date
+    return due_date - timedelta(days=max(duration, 1) - 1)
+
+
+def load_project_graph(project):
+    """Load a project's milestones and dependency edges in two queries.
+
+    Returns a dict with:
+      - ``milestones``: list of milestone value dicts, ordered by id
+      - ``index``: milestone id -> position in ``milestones``
+      - ``predecessors`` / ``successors``: adjacency lists of positions
+    """
+    milestones = list(
+        Milestone.objects.filter(project=project)
+        .order_by('id')
+        .values('id', 'name', 'start_date', 'due_date', 'duration', 'status', 'description')
+    )
+    index = {m['id']: i for i, m in enumerate(milestones)}
+    predecessors = [[] for _ in milestones]
+    successors = [[] for _ in milestones]
+
+    # ``from_milestone`` depends on ``to_milestone``
+    edges = Milestone.dependencies.through.objects.filter(
+        from_milestone__project=project
+    ).values_list('from_milestone_id', 'to_milestone_id')
+
+    for dependent_id, dependency_id in edges:
+        if dependency_id not in index:
+            continue
+        dependent, dependency = index[dependent_id], index[dependency_id]
+        predecessors[dependent].append(dependency)
+        successors[dependency].append(dependent)
+
+    return {
+        'milestones': milestones,
+        'index': index,
+        'predecessors': predecessors,
+        'successors': successors,
+    }
+
+
+def topological_order(graph):
+    """Return milestone positions in dependency order, or raise DependencyCycleError."""
+    predecessors = graph['predecessors']
+    successors = graph['successors']
+    in_degree = [len(preds) for preds in predecessors]
+    queue = deque(i for i, degree in enumerate(in_degree) if degree == 0)
+    order = []
+
+    while queue:
+        node = queue.popleft()
+        order.append(node)
+        for succ in successors[node]:
+            in_degree[succ] -= 1
+            if in_degree[succ] == 0:
+                queue.append(succ)
+
+    if len(order) != len(predecessors):
+        raise DependencyCycleError("Milestone dependencies contain a cycle")
+    return order
+
+
+def compute_schedule(project, graph=None):
+    """Compute earliest/latest start, slack and the critical path of a project.
+
+    Runs in O(V + E) over the graph returned by ``load_project_graph``, which
+    is loaded if not supplied. Returns a dict with:
+      - ``milestones``: milestone id -> earliest/latest dates, slack in days and ``is_critical``
+      - ``critical_path``: ids of zero-slack milestones in dependency order
+      - ``finish_date``: the last day of the scheduled project
+    """
+    if graph is None:
+        graph = load_project_graph(project)
+
+    milestones = graph['milestones']
+    predecessors = graph['predecessors']
+    successors = graph['successors']
+    order = topological_order(graph)
+    origin = project.start_date
+
+    durations = [max(m['duration'] or 1, 1) for m in milestones]
+    earliest_start = [0] * len(milestones)
+    earliest_finish = [0] * len(milestones)
+
+    # Forward pass
+    for node in order:
+        m = milestones[node]
+        start = (planned_start(m['start_date'], m['due_date'], durations[node]) - origin).days
+        for pred in predecessors[node]:
+            start = max(start, earliest_finish[pred])
+        earliest_start[node] = start
+        earliest_finish[node] = start + durations[node]
+
+    project_finish = max(earliest_finish, default=0)
+    latest_finish = [project_finish] * len(milestones)
+    latest_start = [0] * len(milestones)
+
+    # Backward pass
+    for node in reversed(order):
+        finish = project_finish
+        for succ in successors[node]:
+            finish = min(finish, latest_start[succ])
+        latest_finish[node] = finish
+        latest_start[node] = finish - durations[node]
+
+    schedule = {}
+    critical_path = []
+    for node in order:
+        slack = latest_start[node] - earliest_start[node]
+        milestone_id = milestones[node]['id']
+        schedule[milestone_id] = {
+            'earliest_start': origin + timedelta(days=earliest_start[node]),
+            'earliest_finish': origin + timedelta(days=earliest_finish[node] - 1),
+            'latest_start': origin + timedelta(days=latest_start[node]),
+            'latest_finish': origin + timedelta(days=latest_finish[node] - 1),
+            'slack': slack,
+            'is_critical': slack == 0,
+        }
+        if slack == 0:
+            critical_path.append(milestone_id)
+
+    return {
+        'milestones': schedule,
+        'critical_path': critical_path,
+        'finish_date': origin + timedelta(days=project_finish - 1) if milestones else None,
+    }
+
+
+def descendants(graph, position):
+    """Return the positions of every milestone that transitively depends on ``position``."""
+    successors = graph['successors']
+    seen = {position}
+    queue = deque([position])
+    result = []
+
+    while queue:
+        node = queue.popleft()
+        for succ in successors[node]:
+            if succ not in seen:
+                seen.add(succ)
+                result.append(succ)
+                queue.append(succ)
+    return result
+
+
+def cascade_reschedule(milestone, start_date, due_date):
+    """Move a milestone and shift all of its transitive dependents with it.
+
+    Dependents are shifted by the number of days the milestone's due date
+    moved, so the gaps between a milestone and its dependents are preserved.
+    Every changed milestone is written with a single ``bulk_update`` inside one
+    transaction. Raises ValueError if a dependent would leave the project
+    timeframe. Returns the list of updated milestones.
+    """
+    project = milestone.project
+    graph = load_project_graph(project)
+    rows = graph['milestones']
+    position = graph['index'][milestone.id]
+    shift = due_date - rows[position]['due_date']
+    now = timezone.now()
+
+    updated = [Milestone(
+        id=milestone.id,
+        start_date=start_date,
+        due_date=due_date,
+        duration=(due_date - start_date).days + 1,
+        updated_at=now,
+    )]
+
+    if shift:
+        for node in descendants(graph, position):
+            row = rows[node]
+            new_start = planned_start(row['start_date'], row['due_date'], row['duration']) + shift
+            new_due = row['due_date'] + shift
+            if new_start < project.start_date or new_due > project.end_date:
+                raise ValueError(
+                    f"Moving this milestone would push '{row['name']}' outside the project timeframe"
+                )
+            updated.append(Milestone(
+                id=row['id'],
+                start_date=new_start,
+                due_date=new_due,
+                duration=row['duration'],
+                updated_at=now,
+            ))
+
+    with transaction.atomic():
+        Milestone.objects.bulk_update(updated, ['start_date', 'due_date', 'duration', 'updated_at'])
+        # bulk_update bypasses the signals that maintain the analytics rollups and cached views;
+        # the rollups only change with the due dates, the cached series with any date
+        if shift:
+            rebuild_project_rollups([project.id])
+        invalidate_projects([project.id])
+
+    return updated
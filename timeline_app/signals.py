@@ -0,0 +1,198 @@
+from django.db.models import Q, QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Milestone, Notification, Project
+from .closure import add_dependency, remove_dependencies, remove_milestone
+from .notifications import adjust_unread_counts, uncount_notifications
+from .view_cache import bump_data_versions, invalidate_projects
+from . import rollups
+
+MilestoneDependency = Milestone.dependencies.through
+
+
+def _edges(instance, reverse, pk_set):
+    """Return (dependent_id, dependency_id) pairs for an m2m_changed pk_set."""
+    if reverse:
+        # instance.dependent_milestones.<action>(...)
+        return [(pk, instance.pk) for pk in pk_set]
+    return [(instance.pk, pk) for pk in pk_set]
+
+
+def _touch(milestone_ids):
+    """Bump updated_at of milestones whose dependencies changed, so version checks see the change."""
+    milestone_ids = set(milestone_ids)
+    if milestone_ids:
+        Milestone.objects.filter(pk__in=milestone_ids).update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=MilestoneDependency)
+def update_dependency_closure(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'post_add':
+        # Django only passes the ids that were actually added
+        edges = _edges(instance, reverse, pk_set)
+        for dependent_id, dependency_id in edges:
+            add_dependency(dependent_id, dependency_id)
+        _touch(dependent_id for dependent_id, _ in edges)
+
+    elif action == 'pre_remove':
+        # pk_set may contain ids that are not linked, so only remove real edges
+        linked = set(MilestoneDependency.objects.filter(
+            Q(from_milestone=instance) | Q(to_milestone=instance)
+        ).values_list('from_milestone_id', 'to_milestone_id'))
+        edges = [edge for edge in _edges(instance, reverse, pk_set) if edge in linked]
+        remove_dependencies(edges)
+        _touch(dependent_id for dependent_id, _ in edges)
+
+    elif action == 'pre_clear':
+        edges = list(MilestoneDependency.objects.filter(
+            Q(to_milestone=instance) if reverse else Q(from_milestone=instance)
+        ).values_list('from_milestone_id', 'to_milestone_id'))
+        remove_dependencies(edges)
+        _touch(dependent_id for dependent_id, _ in edges)
+
+
+def _deleted_with_project(origin):
+    """Return True if a milestone is being deleted because its project is.
+
+    Milestones are only deleted by cascade from their project, and the closure
+    and rollup rows of the project go with it, so there is nothing to update.
+    """
+    if origin is None or isinstance(origin, Milestone):
+        return False
+    return not (isinstance(origin, QuerySet) and origin.model is Milestone)
+
+
+@receiver(pre_delete, sender=Milestone)
+def remove_milestone_from_closure(sender, instance, origin=None, **kwargs):
+    # Deleting a milestone cascades to its through-table rows without sending
+    # m2m_changed, so drop the chains that pass through it first
+    if _deleted_with_project(origin):
+        return
+    # A bulk delete sends every pre_delete before removing any row, so the
+    # edges of the milestones handled earlier are still in the database
+    deleted_ids = origin.__dict__.setdefault('_closure_deleted_ids', set()) if origin is not None else set()
+    remove_milestone(instance.pk, deleted_ids)
+    deleted_ids.add(instance.pk)
+
+
+@receiver(post_save, sender=Notification)
+def count_created_notification(sender, instance, created, **kwargs):
+    # notify() uses bulk_create, which doesn't send post_save, and adjusts the counters itself
+    if created and not instance.is_read:
+        adjust_unread_counts({instance.user_id: 1})
+
+
+@receiver(pre_delete, sender=Project)
+def uncount_project_notifications(sender, instance, **kwargs):
+    # No delete receivers on Notification, so the cascade deletes them without
+    # loading each one. Deleting a user goes through here for their projects;
+    # their own counter is deleted with them.
+    uncount_notifications(Notification.objects.filter(Q(project=instance) | Q(milestone__project=instance)))
+
+
+@receiver(pre_delete, sender=Milestone)
+def uncount_milestone_notifications(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_project(origin):
+        uncount_notifications(Notification.objects.filter(milestone=instance))
+
+
+@receiver(pre_save, sender=Milestone)
+def remember_milestone_rollup_state(sender, instance, raw=False, **kwargs):
+    # The post_save handler needs the values the rollups and cached series currently show
+    instance._rollup_state = None
+    if instance.pk and not raw:
+        instance._rollup_state = Milestone.objects.filter(pk=instance.pk).values_list(
+            'project_id', 'due_date', 'status', 'start_date', 'duration'
+        ).first()
+
+
+@receiver(post_save, sender=Milestone)
+def update_milestone_rollups(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    current = (instance.project_id, instance.due_date, instance.status, instance.start_date, instance.duration)
+    previous = getattr(instance, '_rollup_state', None)
+    if previous == current:
+        return
+    # The rollups only count (project, due date, status); the analytics series also use the dates
+    if previous is None or previous[:3] != current[:3]:
+        if previous is not None:
+            rollups.count_milestone(*previous[:3], sign=-1)
+        rollups.count_milestone(*current[:3], sign=1)
+    invalidate_projects({current[0], previous[0] if previous else current[0]})
+
+
+@receiver(pre_delete, sender=Milestone)
+def remember_deleted_milestone_rollup_state(sender, instance, origin=None, **kwargs):
+    instance._rollup_state = None
+    if origin is not None and not isinstance(origin, Milestone):
+        # Project deletes drop the rollups with the project, and bulk deletes
+        # rebuild them once per project after the rows are gone
+        return
+    # The instance being deleted may hold values older than the ones the rollups count
+    instance._rollup_state = Milestone.objects.filter(pk=instance.pk).values_list(
+        'project_id', 'due_date', 'status'
+    ).first()
+
+
+@receiver(post_delete, sender=Milestone)
+def remove_milestone_from_rollups(sender, instance, origin=None, **kwargs):
+    if getattr(instance, '_rollup_state', None) is not None:
+        rollups.count_milestone(*instance._rollup_state, sign=-1)
+        invalidate_projects([instance._rollup_state[0]])
+    elif isinstance(origin, QuerySet) and origin.model is Milestone:
+        # post_delete is sent once every deleted row is gone
+        rebuilt = origin.__dict__.setdefault('_rollup_project_ids', set())
+        if instance.project_id not in rebuilt:
+            rebuilt.add(instance.project_id)
+            rollups.rebuild_project_rollups([instance.project_id])
+            invalidate_projects([instance.project_id])
+
+
+@receiver(post_save, sender=Project)
+def create_project_rollups(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        rollups.start_project_rollup(instance)
+        rollups.count_project_access(instance, [instance.user_id])
+        bump_data_versions([instance.user_id])
+    else:
+        invalidate_projects([instance.pk])
+
+
+@receiver(pre_delete, sender=Project)
+def remove_project_from_rollups(sender, instance, **kwargs):
+    # The collaborator links are deleted along with the project without m2m_changed
+    user_ids = [instance.user_id] + list(instance.collaborators.values_list('id', flat=True))
+    rollups.count_project_access(instance, user_ids, sign=-1)
+    invalidate_projects([instance.pk])
+
+
+@receiver(m2m_changed, sender=Project.collaborators.through)
+def update_project_access_rollups(sender, instance, action, reverse, pk_set, **kwargs):
+    Collaborators = Project.collaborators.through
+    if action in ('post_add', 'pre_remove'):
+        sign = 1 if action == 'post_add' else -1
+        links = Collaborators.objects.filter(user_id=instance.pk, project_id__in=pk_set) if reverse \
+            else Collaborators.objects.filter(project_id=instance.pk, user_id__in=pk_set)
+        # post_add only passes new links, but pre_remove may name ones that don't exist
+        pairs = list(links.values_list('project_id', 'user_id'))
+    elif action == 'pre_clear':
+        sign = -1
+        links = Collaborators.objects.filter(user_id=instance.pk) if reverse \
+            else Collaborators.objects.filter(project_id=instance.pk)
+        pairs = list(links.values_list('project_id', 'user_id'))
+    else:
+        return
+
+    projects = {instance.pk: instance} if not reverse else Project.objects.in_bulk({pid for pid, _ in pairs})
+    users_by_project = {}
+    for project_id, user_id in pairs:
+        users_by_project.setdefault(project_id, []).append(user_id)
+    for project_id, user_ids in users_by_project.items():
+        rollups.count_project_access(projects[project_id], user_ids, sign=sign)
+    # Only the users who gained or lost access see different projects
+    bump_data_versions(user_id for _, user_id in pairs)
@@ -1,13 +1,25 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth.models import User
 from django.urls import reverse
-from timeline_app.models import Project, Milestone, Notification
+from timeline_app.models import Project, Milestone, MilestoneClosure, Notification
 from datetime import datetime, timedelta
 from django.utils import timezone
+from django.db import transaction
 import json
+import os
+import tempfile
 
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'views': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'views'},
+})
 class TimelineAppBaseTestCase(TestCase):
     def setUp(self):
+        # Cached values such as unread counts must not leak between tests
+        from django.core.cache import caches
+        for alias in ('default', 'views'):
+            caches[alias].clear()
+
         # Create test users
         self.client = Client()
         self.user = User.objects.create_user(
@@ -75,6 +87,36 @@ class ProjectCRUDTests(TimelineAppBaseTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'Test Project')
 
+    def test_dashboard_in_one_query(self):
+        """Test that the dashboard lists owned and shared projects by start date with progress in one query"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from timeline_app.view_cache import data_version
+        today = timezone.now().date()
+        shared = Project.objects.create(name='Shared Project', start_date=today - timedelta(days=3),
+                                        end_date=today, user=self.collaborator)
+        shared.collaborators.add(self.user, self.collaborator)
+        Project.objects.create(name='Archived Project', start_date=today, end_date=today,
+                               user=self.user, is_archived=True)
+        Milestone.objects.create(name='Done', due_date=today, project=shared, status='completed')
+        Milestone.objects.create(name='Late', due_date=today - timedelta(days=1), project=shared, status='delayed')
+        Milestone.objects.create(name='Done Too', due_date=today, project=self.project, status='completed')
+        self.client.login(username='testuser', password='testpass123')
+        self.client.get(reverse('timeline_app:notifications'))  # Cache the unread count
+        data_version(self.user.pk)  # Cache the list of projects the user can access
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('timeline_app:dashboard'))
+
+        self.assertEqual(len([q for q in queries if 'timeline_app_' in q['sql']]), 1)
+        self.assertEqual(
+            [(p.name, p.milestone_total, p.milestone_completed, p.milestone_overdue) for p in response.context['projects']],
+            [('Shared Project', 2, 1, 1), ('Test Project', 2, 1, 0)]
+        )
+        self.assertEqual([p['name'] for p in json.loads(response.context['projects_json'])],
+                         ['Shared Project', 'Test Project'])
+        self.assertContains(response, '1/2 milestones completed')
+
     def test_project_create(self):
         """Test project creation"""
         self.client.login(username='testuser', password='testpass123')
@@ -199,6 +241,61 @@ class MilestoneTests(TimelineAppBaseTestCase):
         self.assertEqual(updated_milestone.name, 'Updated Milestone')
         self.assertEqual(updated_milestone.status, 'in_progress')
 
+    def create_milestone_with_collaborators(self, count):
+        for i in range(count):
+            self.project.collaborators.add(
+                User.objects.create_user(username=f'member{i}', email=f'member{i}@example.com', password='memberpass123')
+            )
+        self.client.login(username='testuser', password='testpass123')
+        return self.client.post(
+            reverse('timeline_app:milestone_create', kwargs={'project_id': self.project.id}),
+            {'name': 'Fan-out Milestone', 'start_date': self.project.end_date.isoformat(),
+             'due_date': self.project.end_date.isoformat(), 'duration': 1, 'status': 'pending'}
+        )
+
+    def test_milestone_create_notifies_collaborators_in_bulk(self):
+        """Test that collaborator notifications are created with a single insert"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            self.create_milestone_with_collaborators(20)
+
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "timeline_app_notification"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Notification.objects.filter(notification_type='milestone_added').count(), 20)
+
+    def test_milestone_create_can_defer_notifications(self):
+        """Test that the fan-out is queued for the background thread after commit when deferred"""
+        from unittest import mock
+        from timeline_app.notifications import get_fanout_executor
+
+        with self.settings(NOTIFICATION_FANOUT_DEFERRED=True), \
+                self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.create_milestone_with_collaborators(3)
+        self.assertFalse(Notification.objects.filter(notification_type='milestone_added').exists())
+
+        with mock.patch.object(get_fanout_executor(), 'submit') as submit:
+            for callback in callbacks:
+                callback()
+        submit.assert_called_once()
+        notifications = submit.call_args[0][1]
+        self.assertEqual(len(notifications), 3)
+        self.assertTrue(all(n.notification_type == 'milestone_added' for n in notifications))
+
+    def test_failed_deferred_fanout_is_logged(self):
+        """Test that a background fan-out that fails is logged with its traceback"""
+        from unittest import mock
+        from timeline_app.notifications import _create_notifications
+
+        with mock.patch('timeline_app.notifications._insert_notifications', side_effect=RuntimeError('db down')), \
+                mock.patch('timeline_app.notifications.close_old_connections'), \
+                self.assertLogs('timeline_app.notifications', level='ERROR') as logs:
+            _create_notifications([Notification(user=self.user, notification_type='milestone_added', message='New')])
+
+        self.assertIn('Error creating 1 notification(s)', logs.output[0])
+        self.assertIn('RuntimeError: db down', logs.output[0])
+
 class CollaborationTests(TimelineAppBaseTestCase):
     def test_share_project(self):
         """Test sharing a project with another user"""
@@ -222,6 +319,76 @@ class CollaborationTests(TimelineAppBaseTestCase):
             ).exists()
         )
     
+    def test_share_project_queues_email(self):
+        """Test that sharing queues the email and the worker sends it"""
+        from io import StringIO
+        from django.core import mail
+        from django.core.management import call_command
+        from timeline_app.models import OutgoingEmail
+        self.client.login(username='testuser', password='testpass123')
+
+        self.client.post(
+            reverse('timeline_app:share_project', kwargs={'project_id': self.project.id}),
+            {'email': 'collaborator@example.com'}
+        )
+
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get(recipient='collaborator@example.com')
+        self.assertEqual(email.status, 'queued')
+
+        call_command('send_queued_emails', stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Test Project', mail.outbox[0].subject)
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'sent')
+        self.assertIsNotNone(email.sent_at)
+
+    def test_queued_email_retries_with_backoff(self):
+        """Test that failed sends are retried later and eventually marked as failed"""
+        from unittest import mock
+        from django.core import mail
+        from timeline_app.outbox import queue_email, send_queued_emails
+        email = queue_email('collaborator@example.com', 'Subject', 'Body')
+
+        with self.settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2, EMAIL_OUTBOX_RETRY_DELAY=60), \
+                mock.patch('django.core.mail.EmailMessage.send', side_effect=OSError('Connection refused')):
+            self.assertEqual(send_queued_emails(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ('queued', 1))
+            self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+            # Not due yet, so nothing is sent
+            self.assertEqual(send_queued_emails(), (0, 0))
+
+            email.next_attempt_at = timezone.now()
+            email.save()
+            send_queued_emails()
+
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', 2))
+        self.assertIn('Connection refused', email.last_error)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_claimed_emails_are_not_sent_twice(self):
+        """Test that a worker skips the emails another worker has claimed until the claim expires"""
+        from django.core import mail
+        from timeline_app.models import OutgoingEmail
+        from timeline_app.outbox import claim_queued_emails, queue_email, send_queued_emails
+        first = queue_email('first@example.com', 'Subject', 'Body')
+        queue_email('second@example.com', 'Subject', 'Body')
+
+        # Another worker is busy sending the first email
+        self.assertEqual([email.id for email in claim_queued_emails(1, timezone.now())], [first.id])
+        self.assertEqual(send_queued_emails(), (1, 0))
+        self.assertEqual([m.to for m in mail.outbox], [['second@example.com']])
+
+        # It died before recording the result, so the email is sent once its claim expires
+        self.assertEqual(send_queued_emails(), (0, 0))
+        OutgoingEmail.objects.filter(id=first.id).update(next_attempt_at=timezone.now())
+        self.assertEqual(send_queued_emails(), (1, 0))
+        self.assertEqual(len(mail.outbox), 2)
+
     def test_collaborator_can_view_project(self):
         """Test that collaborators can view shared projects"""
         # Add collaborator to project
@@ -306,6 +473,98 @@ class NotificationTests(TimelineAppBaseTestCase):
             ).exists()
         )
     
+    def test_milestone_due_check_is_set_based(self):
+        """Test that the due-date check runs a fixed number of queries and skips existing reminders"""
+        from timeline_app.notifications import unread_count
+        from timeline_app.utils import check_upcoming_milestones
+        self.project.collaborators.add(self.collaborator)
+        tomorrow = timezone.now().date() + timedelta(days=1)
+        for i in range(10):
+            Milestone.objects.create(name=f'Due {i}', due_date=tomorrow, project=self.project)
+        Notification.objects.create(user=self.user, notification_type='milestone_due', project=self.project,
+                                    milestone=Milestone.objects.get(name='Due 0'), message='Already sent')
+        unread_count(self.collaborator)  # Creates the collaborator's counter
+
+        # Milestones, collaborators, existing reminders, then a savepoint around
+        # the bulk insert and one unread-counter update per distinct increment
+        with self.assertNumQueries(8):
+            created = check_upcoming_milestones()
+
+        self.assertEqual(created, 19)
+        self.assertEqual(Notification.objects.filter(notification_type='milestone_due').count(), 20)
+        self.assertEqual(check_upcoming_milestones(), 0)
+
+    def test_check_milestones_shards_cover_all_projects(self):
+        """Test that check_milestones --shard i/N splits the projects by id without overlap"""
+        from io import StringIO
+        from django.core.management import call_command
+        from timeline_app.utils import project_partitions
+        # Shard 2 of 3 is every id with id % 3 == 1, split between two workers
+        self.assertEqual(project_partitions(2, 3, workers=2), [(1, 6), (4, 6)])
+
+        tomorrow = timezone.now().date() + timedelta(days=1)
+        self.milestone.due_date = tomorrow
+        self.milestone.save()
+        other = Project.objects.create(name='Other Project', start_date=self.project.start_date,
+                                       end_date=self.project.end_date, user=self.collaborator)
+        Milestone.objects.create(name='Other Milestone', due_date=tomorrow, project=other)
+
+        first, second = StringIO(), StringIO()
+        call_command('check_milestones', shard='1/2', stdout=first)
+        call_command('check_milestones', shard='2/2', stdout=second)
+
+        self.assertIn('(1 notification(s) created)', first.getvalue())
+        self.assertIn('(1 notification(s) created)', second.getvalue())
+        self.assertEqual(Notification.objects.filter(notification_type='milestone_due').count(), 2)
+
+    def test_check_milestones_runs_with_system_checks(self):
+        """Test that check_milestones still runs when Django's system checks run first, as from the CLI"""
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('check_milestones', skip_checks=False, stdout=out)
+        self.assertIn('Successfully checked milestones', out.getvalue())
+
+    def test_shard_task_drops_stale_connections(self):
+        """Test that a pool task drops its stale connection before and after the check"""
+        from unittest import mock
+        from timeline_app.utils import check_milestone_shard
+        with mock.patch('django.db.close_old_connections') as close:
+            result = check_milestone_shard((0, 1))
+        self.assertEqual(close.call_count, 2)
+        self.assertEqual(result['partition'], (0, 1))
+
+    def test_check_milestones_daemon_only_rechecks_changes(self):
+        """Test that daemon ticks after the first only look at milestones changed since the last tick"""
+        from io import StringIO
+        from unittest import mock
+        from django.core.management import call_command
+        tomorrow = timezone.now().date() + timedelta(days=1)
+        self.milestone.due_date = tomorrow
+        self.milestone.save()
+        later = Milestone.objects.create(name='Later Milestone', due_date=self.project.end_date, project=self.project)
+
+        sleeps = []
+
+        def between_ticks(interval):
+            # Reading the first reminder must not trigger a new one, moving the other milestone must
+            sleeps.append(interval)
+            if len(sleeps) > 1:
+                raise KeyboardInterrupt
+            Notification.objects.update(is_read=True)
+            later.due_date = tomorrow
+            later.save()
+            # Stamped before the first tick started, as if it committed while that tick ran
+            Milestone.objects.filter(pk=later.pk).update(updated_at=timezone.now() - timedelta(minutes=1))
+
+        out = StringIO()
+        with mock.patch('timeline_app.management.commands.check_milestones.time.sleep', side_effect=between_ticks):
+            call_command('check_milestones', daemon=True, interval=0, stdout=out)
+
+        self.assertIn('Successfully checked changed milestones', out.getvalue())
+        self.assertEqual(Notification.objects.filter(milestone=self.milestone).count(), 1)
+        self.assertEqual(Notification.objects.filter(milestone=later).count(), 1)
+
     def test_mark_notification_read(self):
         """Test marking a notification as read"""
         # Create a notification
@@ -352,6 +611,161 @@ class NotificationTests(TimelineAppBaseTestCase):
         self.assertEqual(response.status_code, 302)
         self.assertEqual(Notification.objects.filter(user=self.user, is_read=False).count(), 0)
 
+    def test_unread_counter_follows_notifications(self):
+        """Test that the unread counter is kept in step and used by every page"""
+        from timeline_app.notifications import notify_users, unread_count
+        self.client.login(username='testuser', password='testpass123')
+        first = Notification.objects.create(user=self.user, notification_type='milestone_due',
+                                            project=self.project, message='First')
+        notify_users([self.user.id, self.collaborator.id], 'milestone_added', 'Bulk', project=self.project)
+        self.assertEqual(unread_count(self.user), 2)
+
+        self.client.get(reverse('timeline_app:mark_notification_read', kwargs={'notification_id': first.id}))
+        self.client.get(reverse('timeline_app:mark_notification_read', kwargs={'notification_id': first.id}))
+        self.assertEqual(unread_count(self.user), 1)
+
+        response = self.client.get(reverse('timeline_app:archived_projects'))
+        self.assertEqual(response.context['unread_notifications_count'], 1)
+
+        self.client.get(reverse('timeline_app:mark_all_read'))
+        self.assertEqual(unread_count(self.user), 0)
+        self.assertEqual(unread_count(self.collaborator), 1)
+
+        # Deleting a project deletes its unread notifications too
+        self.project.delete()
+        self.assertEqual(unread_count(self.collaborator), 0)
+
+    def test_cascaded_notification_deletes_are_bulk(self):
+        """Test that notifications deleted with their milestone or project adjust the counters in bulk"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from timeline_app.notifications import notify_users, unread_count
+
+        def delete_queries(count):
+            milestone = Milestone.objects.create(name=f'Noisy {count}', due_date=self.project.end_date,
+                                                 project=self.project)
+            notify_users([self.collaborator.id] * count, 'milestone_added', 'Bulk',
+                         project=self.project, milestone=milestone)
+            with CaptureQueriesContext(connection) as queries:
+                milestone.delete()
+            return len(queries)
+
+        self.assertEqual(delete_queries(2), delete_queries(100))
+        self.assertEqual(unread_count(self.collaborator), 0)
+
+        notify_users([self.user.id, self.collaborator.id], 'milestone_added', 'Bulk', project=self.project)
+        self.assertEqual(unread_count(self.collaborator), 1)
+        self.user.delete()
+        self.assertEqual(unread_count(self.collaborator), 0)
+
+    def test_notifications_inbox_keyset_pagination(self):
+        """Test that the inbox pages through notifications by (created_at, id) without gaps"""
+        from timeline_app.notifications import notify_users, mark_notifications_read
+        from timeline_app.views import NOTIFICATIONS_PAGE_SIZE
+        notify_users([self.user.id] * (NOTIFICATIONS_PAGE_SIZE * 2 + 10), 'milestone_added', 'Bulk', project=self.project)
+        # Ties on created_at are broken by id
+        Notification.objects.update(created_at=timezone.now())
+        mark_notifications_read(self.user, Notification.objects.filter(
+            id__in=list(Notification.objects.order_by('id').values_list('id', flat=True)[:5])
+        ))
+        self.client.login(username='testuser', password='testpass123')
+
+        seen = []
+        url = reverse('timeline_app:notifications')
+        params = {}
+        while True:
+            response = self.client.get(url, params)
+            seen.extend(n.id for n in response.context['notifications'])
+            if not response.context['next_cursor']:
+                break
+            params = {'before': response.context['next_cursor']}
+
+        self.assertEqual(seen, list(Notification.objects.order_by('-id').values_list('id', flat=True)))
+
+        response = self.client.get(url, {'unread': '1'})
+        self.assertEqual(response.context['unread_count'], NOTIFICATIONS_PAGE_SIZE * 2 + 5)
+        self.assertTrue(all(not n.is_read for n in response.context['notifications']))
+
+    def test_prune_notifications(self):
+        """Test that pruning removes old read notifications and repeated reminders in batches"""
+        from io import StringIO
+        from django.core.management import call_command
+        from timeline_app.notifications import unread_count
+
+        def reminder(**kwargs):
+            return Notification.objects.create(user=self.user, notification_type='milestone_due', project=self.project,
+                                               milestone=self.milestone, message='Due soon', **kwargs)
+
+        old_read = [reminder(is_read=True) for _ in range(3)]
+        Notification.objects.filter(id__in=[n.id for n in old_read]).update(created_at=timezone.now() - timedelta(days=100))
+        repeated = reminder()
+        newest = reminder()
+        recent_read = Notification.objects.create(user=self.user, notification_type='project_shared',
+                                                  project=self.project, message='Shared', is_read=True)
+        self.assertEqual(unread_count(self.user), 2)
+
+        out = StringIO()
+        call_command('prune_notifications', days=30, batch_size=2, stdout=out)
+
+        self.assertEqual(set(Notification.objects.values_list('id', flat=True)), {newest.id, recent_read.id})
+        self.assertEqual(unread_count(self.user), 1)
+        self.assertIn('Batch 2: removed 1 expired notification(s)', out.getvalue())
+        self.assertIn('Batch 1: removed 1 repeated reminder notification(s)', out.getvalue())
+        self.assertIn('Removed 4 notification(s)', out.getvalue())
+
+    def test_admin_keeps_unread_counter_in_step(self):
+        """Test that deleting and editing notifications in the admin adjusts the unread counters"""
+        from timeline_app.notifications import unread_count
+        User.objects.create_superuser(username='admin', email='admin@example.com', password='adminpass123')
+        self.client.login(username='admin', password='adminpass123')
+        first, second, third = [
+            Notification.objects.create(user=self.user, notification_type='milestone_due',
+                                        project=self.project, message=f'Due {i}')
+            for i in range(3)
+        ]
+        self.assertEqual(unread_count(self.user), 3)
+
+        self.client.post(reverse('admin:timeline_app_notification_delete', args=[first.id]), {'post': 'yes'})
+        self.assertEqual(unread_count(self.user), 2)
+
+        self.client.post(reverse('admin:timeline_app_notification_changelist'),
+                         {'action': 'delete_selected', '_selected_action': [second.id], 'post': 'yes'})
+        self.assertEqual(unread_count(self.user), 1)
+
+        self.client.post(reverse('admin:timeline_app_notification_change', args=[third.id]), {
+            'user': self.collaborator.id, 'notification_type': 'milestone_due', 'project': self.project.id,
+            'message': 'Due 2', 'is_read': 'on',
+        })
+        third.refresh_from_db()
+        self.assertTrue(third.is_read)
+        self.assertEqual((unread_count(self.user), unread_count(self.collaborator)), (0, 0))
+
+    def test_recount_notifications_repairs_drift(self):
+        """Test that recount_notifications --verify reports drifted counters and a recount fixes them"""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        from timeline_app.notifications import unread_count
+        notification = Notification.objects.create(user=self.user, notification_type='milestone_due',
+                                                   project=self.project, message='Due')
+        self.assertEqual(unread_count(self.user), 1)
+        # Deleting an instance directly bypasses the counter
+        notification.delete()
+        self.assertEqual(unread_count(self.user), 1)
+
+        with self.assertRaises(CommandError):
+            call_command('recount_notifications', verify=True, stdout=StringIO())
+        out = StringIO()
+        call_command('recount_notifications', stdout=out)
+        self.assertIn('Recounted 1 unread counter(s)', out.getvalue())
+        self.assertEqual(unread_count(self.user), 0)
+        call_command('recount_notifications', verify=True, stdout=StringIO())
+
+    def test_notifications_are_fast_deleted(self):
+        """Test that deleting notifications doesn't load them, for pruning and cascades alike"""
+        from django.db.models.deletion import Collector
+        self.assertTrue(Collector(using='default').can_fast_delete(Notification.objects.all()))
+
 class AnalyticsTests(TimelineAppBaseTestCase):
     def test_analytics_view(self):
         """Test analytics view displays correctly"""
@@ -383,6 +797,283 @@ class AnalyticsTests(TimelineAppBaseTestCase):
         self.assertContains(response, 'Milestone Completion Rate')
         self.assertContains(response, 'Milestone Status')
 
+    def test_analytics_counts_in_constant_queries(self):
+        """Test that analytics computes every bucket without a query per project"""
+        yesterday = timezone.now().date() - timedelta(days=1)
+        shared = Project.objects.create(name='Shared Project', start_date=yesterday,
+                                        end_date=self.project.end_date, user=self.collaborator)
+        shared.collaborators.add(self.user)
+        Milestone.objects.create(name='Overdue', due_date=yesterday, project=shared, status='delayed')
+        Milestone.objects.create(name='Done', due_date=timezone.now().date(), project=shared, status='completed')
+        Milestone.objects.create(name='Late Done', due_date=yesterday, project=shared, status='completed')
+        self.client.login(username='testuser', password='testpass123')
+        self.client.get(reverse('timeline_app:analytics'))  # Warm up the session
+
+        def query_count():
+            from django.core.cache import caches
+            from django.db import connection
+            from django.test.utils import CaptureQueriesContext
+            caches['views'].clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('timeline_app:analytics'))
+            return len(queries), response
+
+        queries, response = query_count()
+        stats = response.context['milestone_stats']
+        self.assertEqual(
+            {k: stats[k] for k in ('total', 'completed', 'delayed', 'pending', 'overdue', 'past', 'today', 'upcoming')},
+            {'total': 4, 'completed': 2, 'delayed': 1, 'pending': 1, 'overdue': 1, 'past': 2, 'today': 1, 'upcoming': 1}
+        )
+        self.assertEqual(stats['completion_percentage'], 50)
+        self.assertEqual([p['name'] for p in response.context['top_projects']], ['Shared Project', 'Test Project'])
+
+        for i in range(5):
+            Project.objects.create(name=f'Extra {i}', start_date=yesterday, end_date=self.project.end_date, user=self.user)
+        self.assertEqual(query_count()[0], queries)
+
+    def test_series_match_day_by_day_counts(self):
+        """Test that the vectorized series equal counting the milestones day by day"""
+        from timeline_app.timeseries import milestone_arrays, milestone_series
+        today = timezone.now().date()
+        for offset, length, status in [(-6, 3, 'completed'), (-2, 0, 'pending'), (-1, 5, 'completed'), (3, 2, 'delayed')]:
+            Milestone.objects.create(name=f'M{offset}', start_date=today + timedelta(days=offset),
+                                     due_date=today + timedelta(days=offset + length),
+                                     project=self.project, status=status)
+        milestones = list(Milestone.objects.all())
+
+        series = milestone_series(*milestone_arrays(Milestone.objects.all()), today=today)
+
+        self.assertEqual(series['total'], 5)
+        for i, label in enumerate(series['labels']):
+            day = datetime.strptime(label, '%Y-%m-%d').date()
+            due = [m for m in milestones if m.due_date <= day]
+            done = [m for m in due if m.status == 'completed']
+            active = [m for m in milestones if (m.start_date or m.due_date) <= day <= m.due_date]
+            self.assertEqual(series['planned_done'][i], len(due))
+            self.assertEqual(series['planned_remaining'][i], 5 - len(due))
+            self.assertEqual(series['active'][i], len(active))
+            self.assertEqual(series['completed'][i], len(done) if day <= today else None)
+            self.assertEqual(series['remaining'][i], 5 - len(done) if day <= today else None)
+
+    def test_series_endpoint(self):
+        """Test the JSON series for all projects, one project, and a project of another user"""
+        today = timezone.now().date()
+        other = Project.objects.create(name='Other', start_date=today, end_date=today, user=self.collaborator)
+        Milestone.objects.create(name='Other Milestone', due_date=today, project=other)
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('timeline_app:analytics_series')
+
+        series = self.client.get(url).json()
+        self.assertEqual(series['total'], 1)
+        self.assertEqual(len(series['labels']), len(series['active']))
+        self.assertEqual(self.client.get(url, {'project': self.project.id}).json()['total'], 1)
+        self.assertEqual(self.client.get(url, {'project': other.id}).status_code, 403)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.collaborators.add(self.user)
+        self.assertEqual(self.client.get(url).json()['total'], 2)
+        self.assertEqual(self.client.get(url, {'project': other.id}).json()['total'], 1)
+
+class AnalyticsRollupTests(TimelineAppBaseTestCase):
+    def verify(self):
+        from io import StringIO
+        from django.core.management import call_command
+        call_command('rebuild_rollups', verify=True, stdout=StringIO())
+
+    def test_rollups_follow_changes(self):
+        """Test that signal-maintained rollups match a rebuild from scratch"""
+        from timeline_app.scheduling import cascade_reschedule
+        today = timezone.now().date()
+        overdue = Milestone.objects.create(name='Overdue', due_date=today - timedelta(days=1), project=self.project)
+        due_today = Milestone.objects.create(name='Today', due_date=today, project=self.project, status='in_progress')
+        dependent = Milestone.objects.create(name='Dependent', due_date=today + timedelta(days=20), project=self.project)
+        dependent.dependencies.add(self.milestone)
+        self.verify()
+
+        overdue.status = 'completed'
+        overdue.save()
+        due_today.due_date = today + timedelta(days=2)
+        due_today.save()
+        cascade_reschedule(self.milestone, self.milestone.start_date, self.milestone.due_date + timedelta(days=3))
+        self.verify()
+
+        other = Project.objects.create(name='Other', start_date=today, end_date=today, user=self.collaborator)
+        other.collaborators.add(self.user)
+        self.user.shared_projects.remove(other)
+        self.project.collaborators.add(self.collaborator)
+        # The instance still has the due date from before the cascade
+        dependent.delete()
+        self.verify()
+
+        self.project.delete()
+        self.verify()
+
+    def test_due_date_buckets_move_forward(self):
+        """Test that rollups computed on an earlier day are moved forward correctly"""
+        from timeline_app.rollups import compute_project_rollups, project_rollups, rebuild_project_rollups, COUNT_FIELDS
+        today = timezone.now().date()
+        for offset, status in [(-4, 'pending'), (-2, 'completed'), (-1, 'delayed'), (0, 'pending'), (2, 'pending')]:
+            Milestone.objects.create(name=f'M{offset}', due_date=today + timedelta(days=offset),
+                                     project=self.project, status=status)
+
+        rebuild_project_rollups([self.project.id], today=today - timedelta(days=3))
+        moved = project_rollups([self.project.id])[self.project.id]
+
+        expected = compute_project_rollups([self.project.id])[0][0]
+        self.assertEqual(moved.as_of, today)
+        self.assertEqual({f: getattr(moved, f) for f in COUNT_FIELDS}, {f: getattr(expected, f) for f in COUNT_FIELDS})
+        self.assertEqual((moved.past, moved.today, moved.overdue), (3, 1, 2))
+
+    def test_analytics_reads_rollups_only(self):
+        """Test that the analytics page doesn't touch the milestone table"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        self.client.login(username='testuser', password='testpass123')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('timeline_app:analytics'))
+
+        self.assertEqual(response.context['milestone_stats']['total'], 1)
+        self.assertFalse([q for q in queries if 'FROM "timeline_app_milestone"' in q['sql']])
+
+    def test_bulk_milestone_delete_rebuilds_rollups(self):
+        """Test that a queryset delete of milestones leaves the rollups matching the milestones"""
+        from timeline_app.models import ProjectRollup
+        for i in range(5):
+            Milestone.objects.create(name=f'Bulk {i}', due_date=self.milestone.due_date, project=self.project)
+
+        Milestone.objects.filter(name__startswith='Bulk').exclude(name='Bulk 0').delete()
+
+        self.verify()
+        self.assertEqual(ProjectRollup.objects.get(project=self.project).total, 2)
+
+    def test_project_delete_is_independent_of_size(self):
+        """Test that deleting a project runs the same queries however many milestones it has"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def delete_queries(milestones):
+            project = Project.objects.create(name=f'Delete {milestones}', start_date=self.project.start_date,
+                                             end_date=self.project.end_date, user=self.user)
+            for i in range(milestones):
+                Milestone.objects.create(name=f'M{i}', due_date=self.project.end_date, project=project)
+            with CaptureQueriesContext(connection) as queries:
+                project.delete()
+            return len(queries)
+
+        self.assertEqual(delete_queries(2), delete_queries(30))
+        self.verify()
+
+    def test_verify_detects_drift(self):
+        """Test that rebuild_rollups --verify reports drift and a rebuild fixes it"""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        from timeline_app.models import ProjectRollup
+        ProjectRollup.objects.filter(project=self.project).update(total=42)
+
+        with self.assertRaises(CommandError):
+            self.verify()
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.verify()
+
+class ViewCacheTests(TimelineAppBaseTestCase):
+    def test_repeat_dashboard_load_skips_orm(self):
+        """Test that an unchanged dashboard and analytics page are served from the cache"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        self.client.login(username='testuser', password='testpass123')
+
+        for name in ('timeline_app:dashboard', 'timeline_app:analytics'):
+            self.client.get(reverse(name))
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 200)
+            # Only the session and user lookups of the authentication middleware remain
+            self.assertFalse([q['sql'] for q in queries if 'timeline_app_' in q['sql']])
+
+    def test_writes_invalidate_cached_contexts(self):
+        """Test that edits, status changes, archiving and sharing show up on the next load"""
+        dashboard = reverse('timeline_app:dashboard')
+        analytics = reverse('timeline_app:analytics')
+        self.client.login(username='collaborator', password='collabpass123')
+        self.assertNotContains(self.client.get(dashboard), 'Test Project')
+
+        self.client.login(username='testuser', password='testpass123')
+        self.assertContains(self.client.get(dashboard), 'Test Project')
+        self.assertEqual(self.client.get(analytics).context['milestone_stats']['completed'], 0)
+
+        # The cached versions change once the writes commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('timeline_app:project_update', kwargs={'project_id': self.project.id}), {
+                'name': 'Renamed Project',
+                'start_date': self.project.start_date,
+                'end_date': self.project.end_date,
+            })
+        self.assertContains(self.client.get(dashboard), 'Renamed Project')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('timeline_app:update_milestone_status',
+                                    kwargs={'milestone_id': self.milestone.id, 'status': 'completed'}))
+        self.assertEqual(self.client.get(analytics).context['milestone_stats']['completed'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('timeline_app:share_project', kwargs={'project_id': self.project.id}),
+                             {'email': 'collaborator@example.com'})
+            self.client.get(reverse('timeline_app:archive_project', kwargs={'project_id': self.project.id}))
+        self.assertEqual(self.client.get(dashboard).context['projects'], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('timeline_app:unarchive_project', kwargs={'project_id': self.project.id}))
+        self.client.login(username='collaborator', password='collabpass123')
+        self.assertContains(self.client.get(dashboard), 'Renamed Project')
+
+    def test_shared_project_write_touches_one_key(self):
+        """Test that a write to a shared project replaces one cache entry, once it commits"""
+        from unittest import mock
+        from timeline_app.view_cache import get_view_cache
+        other_users = [User.objects.create_user(username=f'member{i}', password='x') for i in range(20)]
+        self.project.collaborators.add(*other_users)
+
+        view_cache = get_view_cache()
+        with mock.patch.object(view_cache, 'set_many', wraps=view_cache.set_many) as set_many, \
+                self.captureOnCommitCallbacks() as callbacks:
+            self.milestone.status = 'completed'
+            self.milestone.save()
+        set_many.assert_not_called()
+
+        with mock.patch.object(view_cache, 'set_many', wraps=view_cache.set_many) as set_many:
+            for callback in callbacks:
+                callback()
+        set_many.assert_called_once()
+        self.assertEqual(list(set_many.call_args[0][0]), [f'views:project:{self.project.id}'])
+
+    def test_start_date_changes_invalidate_cached_series(self):
+        """Test that moving only a milestone's start date shows up in the cached analytics series"""
+        import json
+        series_url = reverse('timeline_app:analytics_series')
+        self.client.login(username='testuser', password='testpass123')
+        today = timezone.now().date()
+        self.assertEqual(self.client.get(series_url).json()['active'][2], 0)
+
+        # Dragging the start of the bar leaves the due date, and so the rollups, unchanged
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('timeline_app:update_milestone_dates', kwargs={'milestone_id': self.milestone.id}),
+                data=json.dumps({
+                    'start_date': (today + timedelta(days=2)).strftime('%Y-%m-%d'),
+                    'due_date': self.milestone.due_date.strftime('%Y-%m-%d'),
+                }),
+                content_type='application/json'
+            )
+        self.assertEqual(self.client.get(series_url).json()['active'][2], 1)
+
+        self.milestone.refresh_from_db()
+        self.milestone.start_date = today + timedelta(days=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.milestone.save()
+        self.assertEqual(self.client.get(series_url).json()['active'][2], 0)
+
 class ArchiveTests(TimelineAppBaseTestCase):
     def test_archive_project(self):
         """Test archiving a project"""
@@ -481,6 +1172,78 @@ class GanttChartTests(TimelineAppBaseTestCase):
         self.assertTrue(len(response.redirect_chain) > 0, 
                            "Expected a redirect but none occurred")
     
+    def test_gantt_data_conditional_get(self):
+        """Test that unchanged Gantt data is answered with 304 Not Modified"""
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('timeline_app:project_gantt_data', kwargs={'project_id': self.project.id})
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Adding a dependency changes the payload and therefore the ETag
+        other = Milestone.objects.create(name='Other', due_date=self.milestone.due_date, project=self.project)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        self.milestone.dependencies.add(other)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_gantt_data_requires_permission(self):
+        """Test that users without access cannot load the Gantt data"""
+        User.objects.create_user(username='otheruser', email='otheruser@example.com', password='otherpass123')
+        self.client.login(username='otheruser', password='otherpass123')
+
+        response = self.client.get(
+            reverse('timeline_app:project_gantt_data', kwargs={'project_id': self.project.id})
+        )
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_gantt_data_window(self):
+        """Test loading the milestones of a date window page by page"""
+        start = self.project.start_date
+        for i in range(3):
+            Milestone.objects.create(
+                name=f'Window {i}',
+                start_date=start + timedelta(days=20 + i),
+                due_date=start + timedelta(days=21 + i),
+                project=self.project
+            )
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('timeline_app:project_gantt_data', kwargs={'project_id': self.project.id})
+        window = {'start': str(start + timedelta(days=18)), 'end': str(start + timedelta(days=30)), 'limit': 2}
+
+        data = json.loads(self.client.get(url, window).content)
+        self.assertEqual([m['name'] for m in data['milestones']], ['Window 0', 'Window 1'])
+        self.assertTrue(data['window']['has_more'])
+
+        data = json.loads(self.client.get(url, dict(window, offset=2)).content)
+        self.assertEqual([m['name'] for m in data['milestones']], ['Window 2'])
+        self.assertFalse(data['window']['has_more'])
+
+        response = self.client.get(url, {'start': 'soon', 'end': str(start)})
+        self.assertEqual(response.status_code, 400)
+
+    def test_large_project_gantt_view_is_windowed(self):
+        """Test that large projects render the Gantt page in windowed mode"""
+        from unittest import mock
+        self.client.login(username='testuser', password='testpass123')
+
+        with mock.patch('timeline_app.views.GANTT_WINDOW_THRESHOLD', 0):
+            response = self.client.get(
+                reverse('timeline_app:project_gantt_view', kwargs={'project_id': self.project.id})
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['windowed'])
+        self.assertContains(response, 'Showing the first 1 of 1 milestones')
+
     def test_update_milestone_dates(self):
         """Test updating milestone dates via AJAX"""
         self.client.login(username='testuser', password='testpass123')
@@ -514,6 +1277,289 @@ class GanttChartTests(TimelineAppBaseTestCase):
         self.assertEqual(self.milestone.start_date.strftime('%Y-%m-%d'), updated_start_date)
         self.assertEqual(self.milestone.due_date.strftime('%Y-%m-%d'), updated_due_date)
 
+class SchedulingTests(TimelineAppBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        start = self.project.start_date
+        # A (3 days) -> B (4 days) -> D (2 days), and A -> C (1 day) -> D
+        self.a = Milestone.objects.create(name='A', start_date=start, due_date=start + timedelta(days=2),
+                                          duration=3, project=self.project)
+        self.b = Milestone.objects.create(name='B', start_date=start, due_date=start + timedelta(days=3),
+                                          duration=4, project=self.project)
+        self.c = Milestone.objects.create(name='C', start_date=start, due_date=start,
+                                          duration=1, project=self.project)
+        self.d = Milestone.objects.create(name='D', start_date=start, due_date=start + timedelta(days=1),
+                                          duration=2, project=self.project)
+        self.b.dependencies.add(self.a)
+        self.c.dependencies.add(self.a)
+        self.d.dependencies.add(self.b, self.c)
+        # Keep the base milestone out of the way
+        self.milestone.delete()
+
+    def test_critical_path_and_slack(self):
+        """Test earliest/latest starts, slack and critical path"""
+        from timeline_app.scheduling import compute_schedule
+
+        schedule = compute_schedule(self.project)
+        start = self.project.start_date
+
+        self.assertEqual(schedule['critical_path'], [self.a.id, self.b.id, self.d.id])
+        self.assertEqual(schedule['milestones'][self.b.id]['earliest_start'], start + timedelta(days=3))
+        self.assertEqual(schedule['milestones'][self.d.id]['earliest_start'], start + timedelta(days=7))
+        self.assertEqual(schedule['milestones'][self.c.id]['slack'], 3)
+        self.assertEqual(schedule['milestones'][self.c.id]['latest_start'], start + timedelta(days=6))
+        self.assertEqual(schedule['finish_date'], start + timedelta(days=8))
+
+    def test_schedule_uses_two_queries(self):
+        """Test that the graph is loaded with a constant number of queries"""
+        from timeline_app.scheduling import compute_schedule
+
+        with self.assertNumQueries(2):
+            compute_schedule(self.project)
+
+    def test_cycle_detection(self):
+        """Test that a dependency cycle is reported"""
+        from timeline_app.scheduling import compute_schedule, DependencyCycleError
+
+        # Bypass the closure signals, which reject cycles, to simulate legacy data
+        Milestone.dependencies.through.objects.create(from_milestone=self.a, to_milestone=self.d)
+        with self.assertRaises(DependencyCycleError):
+            compute_schedule(self.project)
+
+    def test_gantt_data_includes_schedule(self):
+        """Test that the Gantt JSON includes the computed schedule"""
+        self.client.login(username='testuser', password='testpass123')
+
+        response = self.client.get(
+            reverse('timeline_app:project_gantt_data', kwargs={'project_id': self.project.id})
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        milestones = {m['id']: m for m in data['milestones']}
+        self.assertEqual(data['critical_path'], [self.a.id, self.b.id, self.d.id])
+        self.assertTrue(milestones[self.b.id]['is_critical'])
+        self.assertFalse(milestones[self.c.id]['is_critical'])
+        self.assertEqual(sorted(milestones[self.d.id]['dependencies']), sorted([self.b.id, self.c.id]))
+
+    def test_update_dates_cascades_to_dependents(self):
+        """Test that moving a milestone shifts its transitive dependents"""
+        self.client.login(username='testuser', password='testpass123')
+        start = self.project.start_date
+        c_due = Milestone.objects.get(id=self.c.id).due_date
+
+        response = self.client.post(
+            reverse('timeline_app:update_milestone_dates', kwargs={'milestone_id': self.a.id}),
+            data=json.dumps({
+                'start_date': (start + timedelta(days=2)).strftime('%Y-%m-%d'),
+                'due_date': (start + timedelta(days=4)).strftime('%Y-%m-%d')
+            }),
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        changed = {m['id'] for m in json.loads(response.content)['milestones']}
+        self.assertEqual(changed, {self.a.id, self.b.id, self.c.id, self.d.id})
+        self.assertEqual(Milestone.objects.get(id=self.c.id).due_date, c_due + timedelta(days=2))
+        self.assertEqual(Milestone.objects.get(id=self.d.id).start_date, start + timedelta(days=2))
+
+    def test_update_dates_cascade_outside_timeframe(self):
+        """Test that a cascade pushing a dependent past the project end is rejected"""
+        self.client.login(username='testuser', password='testpass123')
+        end = self.project.end_date
+
+        response = self.client.post(
+            reverse('timeline_app:update_milestone_dates', kwargs={'milestone_id': self.a.id}),
+            data=json.dumps({
+                'start_date': (end - timedelta(days=1)).strftime('%Y-%m-%d'),
+                'due_date': end.strftime('%Y-%m-%d')
+            }),
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.start_date, self.project.start_date)
+
+class DependencyClosureTests(TimelineAppBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        # chain[0] <- chain[1] <- chain[2] <- chain[3], each depending on the previous one
+        self.chain = [self.milestone]
+        for i in range(3):
+            milestone = Milestone.objects.create(
+                name=f'Chain {i}',
+                due_date=self.milestone.due_date,
+                project=self.project
+            )
+            milestone.dependencies.add(self.chain[-1])
+            self.chain.append(milestone)
+
+    def closure(self):
+        return set(MilestoneClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+
+    def test_closure_tracks_transitive_dependencies(self):
+        """Test that ancestors and descendants are answered from the closure table"""
+        from timeline_app.closure import ancestor_ids, descendant_ids
+
+        first, last = self.chain[0], self.chain[-1]
+        self.assertEqual(ancestor_ids(last.id), {m.id for m in self.chain[:-1]})
+        self.assertEqual(descendant_ids(first.id), {m.id for m in self.chain[1:]})
+        self.assertIn((first.id, last.id, 3), self.closure())
+
+    def test_cycle_is_rejected(self):
+        """Test that adding a dependency that closes a cycle fails"""
+        from timeline_app.scheduling import DependencyCycleError
+
+        with self.assertRaises(DependencyCycleError), transaction.atomic():
+            self.chain[0].dependencies.add(self.chain[-1])
+        self.assertFalse(self.chain[0].dependencies.exists())
+
+    def test_closure_matches_rebuild_after_changes(self):
+        """Test that incremental maintenance agrees with a full rebuild"""
+        from timeline_app.closure import rebuild_project_closure
+
+        # Add a shortcut, remove a middle edge and delete a milestone
+        self.chain[3].dependencies.add(self.chain[0])
+        self.chain[2].dependencies.remove(self.chain[1])
+        self.chain[1].delete()
+        incremental = self.closure()
+
+        rebuild_project_closure(self.project)
+        self.assertEqual(incremental, self.closure())
+        self.assertIn((self.chain[0].id, self.chain[3].id, 1), incremental)
+
+    def test_closure_stays_small_for_deep_phased_plans(self):
+        """Test that a plan whose every milestone depends on the whole previous phase stays indexable"""
+        from timeline_app.closure import rebuild_project_closure
+
+        # 3 milestones per phase, each depending on all 3 of the previous phase:
+        # 3^depth chains, but only one row per pair
+        phase = []
+        for depth in range(45):
+            current = [
+                Milestone.objects.create(name=f'Phase {depth}.{i}', due_date=self.milestone.due_date, project=self.project)
+                for i in range(3)
+            ]
+            for milestone in current:
+                milestone.dependencies.add(*phase)
+            phase = current
+
+        rows = self.closure()
+        self.assertIn((self.chain[0].id, self.chain[3].id, 3), rows)
+        self.assertEqual(MilestoneClosure.objects.filter(descendant=phase[0]).count(), 44 * 3)
+        self.assertEqual(MilestoneClosure.objects.get(descendant=phase[0], ancestor__name='Phase 0.0').depth, 44)
+
+        # Removing a milestone keeps the others connected through the rest of its phase
+        Milestone.objects.filter(name__in=['Phase 10.0', 'Phase 10.1']).delete()
+        incremental = self.closure()
+        self.assertEqual(MilestoneClosure.objects.filter(descendant=phase[0]).count(), 44 * 3 - 2)
+        rebuild_project_closure(self.project)
+        self.assertEqual(incremental, self.closure())
+
+    def test_project_delete_skips_closure_upkeep(self):
+        """Test that deleting a project leaves the closure rows to the cascade"""
+        from unittest import mock
+        with mock.patch('timeline_app.signals.remove_milestone') as remove:
+            self.project.delete()
+        remove.assert_not_called()
+        self.assertFalse(MilestoneClosure.objects.exists())
+
+    def test_admin_rejects_cycle_as_validation_error(self):
+        """Test that saving a cyclic dependency in the admin shows a form error instead of failing"""
+        first, last = self.chain[0], self.chain[-1]
+        User.objects.create_superuser(username='admin', email='admin@example.com', password='adminpass123')
+        self.client.login(username='admin', password='adminpass123')
+
+        response = self.client.post(reverse('admin:timeline_app_milestone_change', args=[first.id]), {
+            'name': first.name, 'start_date': first.start_date, 'duration': first.duration,
+            'due_date': first.due_date, 'project': self.project.id, 'description': '',
+            'status': first.status, 'dependencies': [last.id],
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'cannot depend on itself or on a milestone that depends on it')
+        self.assertFalse(first.dependencies.exists())
+
+    def test_form_excludes_dependents(self):
+        """Test that the milestone form does not offer milestones that would create a cycle"""
+        from timeline_app.forms import MilestoneForm
+
+        form = MilestoneForm(instance=self.chain[1], project=self.project)
+        choices = set(form.fields['dependencies'].queryset.values_list('id', flat=True))
+        self.assertEqual(choices, {self.chain[0].id})
+
+class BatchDateUpdateTests(TimelineAppBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.second = Milestone.objects.create(
+            name='Second Milestone',
+            start_date=self.project.start_date,
+            due_date=self.project.start_date + timedelta(days=2),
+            duration=3,
+            project=self.project
+        )
+        self.url = reverse('timeline_app:update_milestone_dates_batch', kwargs={'project_id': self.project.id})
+
+    def post(self, entries):
+        return self.client.post(self.url, data=json.dumps({'milestones': entries}),
+                                content_type='application/json')
+
+    def test_batch_update(self):
+        """Test updating several milestones in one request"""
+        self.client.login(username='testuser', password='testpass123')
+        start = self.project.start_date
+
+        response = self.post([
+            {'id': self.milestone.id, 'start_date': str(start + timedelta(days=1)), 'due_date': str(start + timedelta(days=3))},
+            {'id': self.second.id, 'start_date': str(start + timedelta(days=4)), 'due_date': str(start + timedelta(days=4))},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.milestone.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual(self.milestone.start_date, start + timedelta(days=1))
+        self.assertEqual(self.milestone.duration, 3)
+        self.assertEqual(self.second.due_date, start + timedelta(days=4))
+        self.assertEqual(self.second.duration, 1)
+
+    def test_batch_update_is_all_or_nothing(self):
+        """Test that one invalid entry rejects the whole batch"""
+        self.client.login(username='testuser', password='testpass123')
+        start = self.project.start_date
+
+        response = self.post([
+            {'id': self.milestone.id, 'start_date': str(start + timedelta(days=1)), 'due_date': str(start + timedelta(days=3))},
+            {'id': self.second.id, 'start_date': str(start), 'due_date': str(self.project.end_date + timedelta(days=1))},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content)['id'], self.second.id)
+        self.milestone.refresh_from_db()
+        self.assertEqual(self.milestone.start_date, start + timedelta(days=5))
+
+    def test_batch_update_rejects_non_integer_ids(self):
+        """Test that ids that are not integers are rejected with a 400"""
+        self.client.login(username='testuser', password='testpass123')
+        day = str(self.project.start_date)
+
+        for milestone_id in ([self.milestone.id], {'id': 1}, str(self.milestone.id), True, None):
+            response = self.post([{'id': milestone_id, 'start_date': day, 'due_date': day}])
+            self.assertEqual(response.status_code, 400)
+        self.milestone.refresh_from_db()
+        self.assertNotEqual(self.milestone.due_date, self.project.start_date)
+
+    def test_batch_update_requires_owner(self):
+        """Test that collaborators cannot batch update milestones"""
+        self.project.collaborators.add(self.collaborator)
+        self.client.login(username='collaborator', password='collabpass123')
+
+        response = self.post([
+            {'id': self.milestone.id, 'start_date': str(self.project.start_date), 'due_date': str(self.project.start_date)},
+        ])
+
+        self.assertEqual(response.status_code, 403)
+
 class ExportTests(TimelineAppBaseTestCase):
     def test_export_project_as_csv(self):
         """Test exporting a project as CSV"""
@@ -529,24 +1575,389 @@ class ExportTests(TimelineAppBaseTestCase):
         self.assertTrue('attachment; filename=' in response['Content-Disposition'])
         
         # Check CSV content
-        content = response.content.decode('utf-8')
+        content = b''.join(response.streaming_content).decode('utf-8')
         self.assertIn('Test Project', content)
         self.assertIn('Test Milestone', content)
     
-    def test_export_project_as_pdf(self):
-        """Test exporting a project as PDF - text format for testing"""
+    def test_export_csv_includes_milestone_details(self):
+        """Test that the CSV export lists dates, status, description and dependencies"""
+        import csv
+        second = Milestone.objects.create(
+            name='Second Milestone',
+            due_date=self.milestone.due_date,
+            project=self.project,
+            status='in_progress',
+            description='Needs the first one'
+        )
+        second.dependencies.add(self.milestone)
         self.client.login(username='testuser', password='testpass123')
         
         response = self.client.get(
             reverse('timeline_app:export_project', 
-                   kwargs={'project_id': self.project.id, 'format_type': 'pdf'})
+                   kwargs={'project_id': self.project.id, 'format_type': 'csv'})
         )
         
-        self.assertEqual(response.status_code, 200)
-        # If you haven't implemented PDF generation, this test can check for text/plain instead
-        self.assertEqual(response['Content-Type'], 'text/plain')  # Changed from application/pdf
-        self.assertTrue('attachment; filename=' in response['Content-Disposition'])
+        rows = list(csv.reader(b''.join(response.streaming_content).decode('utf-8').splitlines()))
+        self.assertEqual(rows[4], ['ID', 'Name', 'Start Date', 'Due Date', 'Duration', 'Status', 'Description', 'Dependencies'])
+        self.assertEqual(rows[6], [
+            str(second.id), 'Second Milestone', str(second.due_date), str(second.due_date), '1',
+            'In Progress', 'Needs the first one', str(self.milestone.id)
+        ])
+    
+    def test_export_project_as_pdf(self):
+        """Test exporting a project as PDF"""
+        self.client.login(username='testuser', password='testpass123')
+        
+        with tempfile.TemporaryDirectory() as cache_dir, self.settings(PDF_EXPORT_CACHE_DIR=cache_dir):
+            response = self.client.get(
+                reverse('timeline_app:export_project', 
+                       kwargs={'project_id': self.project.id, 'format_type': 'pdf'})
+            )
+            
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+            self.assertTrue('attachment; filename=' in response['Content-Disposition'])
+            self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+    
+    def test_export_pdf_is_cached_per_version(self):
+        """Test that unchanged projects are served from the cached PDF"""
+        from unittest import mock
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('timeline_app:export_project', 
+                      kwargs={'project_id': self.project.id, 'format_type': 'pdf'})
+        
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                self.settings(PDF_EXPORT_CACHE_DIR=cache_dir, PDF_EXPORT_WORKERS=0):
+            b''.join(self.client.get(url).streaming_content)
+            first_files = os.listdir(cache_dir)
+            
+            with mock.patch('timeline_app.pdf_export.render_pdf_file') as render:
+                b''.join(self.client.get(url).streaming_content)
+                render.assert_not_called()
+            
+            # Changing a milestone renders a new version and drops the old one
+            self.milestone.status = 'completed'
+            self.milestone.save()
+            b''.join(self.client.get(url).streaming_content)
+            second_files = os.listdir(cache_dir)
+            self.assertEqual(len(second_files), 1)
+            self.assertNotEqual(first_files, second_files)
+    
+    def test_export_pdf_replaces_broken_pool(self):
+        """Test that a render pool with a dead worker is replaced instead of failing every export"""
+        from concurrent.futures.process import BrokenProcessPool
+        from unittest import mock
+        from . import utils
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('timeline_app:export_project', 
+                      kwargs={'project_id': self.project.id, 'format_type': 'pdf'})
+        broken = mock.Mock()
+        broken.submit.side_effect = BrokenProcessPool()
+        
+        with tempfile.TemporaryDirectory() as cache_dir, self.settings(PDF_EXPORT_CACHE_DIR=cache_dir), \
+                mock.patch.object(utils, '_pdf_executor', broken):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+            self.assertIsNot(utils._pdf_executor, broken)
+            broken.shutdown.assert_called_once()
+    
+    def test_export_pdf_timeout_shows_error(self):
+        """Test that a render that takes too long is reported to the user"""
+        from unittest import mock
+        from . import utils
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('timeline_app:export_project', 
+                      kwargs={'project_id': self.project.id, 'format_type': 'pdf'})
+        slow = mock.Mock()
+        slow.submit.return_value.result.side_effect = TimeoutError()
+        
+        with tempfile.TemporaryDirectory() as cache_dir, self.settings(PDF_EXPORT_CACHE_DIR=cache_dir), \
+                mock.patch.object(utils, '_pdf_executor', slow):
+            response = self.client.get(url, follow=True)
+        
+        self.assertRedirects(response, reverse('timeline_app:project_detail', kwargs={'project_id': self.project.id}))
+        self.assertIn('taking too long', str(list(response.context['messages'])[0]))
+        slow.submit.return_value.cancel.assert_called_once()
+    
+    def test_export_pdf_rerenders_vanished_file(self):
+        """Test that a PDF removed before it could be opened is rendered again"""
+        from unittest import mock
+        from .pdf_export import render_pdf_file
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('timeline_app:export_project', 
+                      kwargs={'project_id': self.project.id, 'format_type': 'pdf'})
+        
+        # The first render's file is gone by the time it is opened
+        renders = [lambda html, path: None, render_pdf_file]
+        
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                self.settings(PDF_EXPORT_CACHE_DIR=cache_dir, PDF_EXPORT_WORKERS=0), \
+                mock.patch('timeline_app.pdf_export.render_pdf_file',
+                           side_effect=lambda html, path: renders.pop(0)(html, path)) as render:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+            self.assertEqual(render.call_count, 2)
                 
+class BulkExportTests(TimelineAppBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        other_owner = User.objects.create_user(username='owner2', email='owner2@example.com', password='ownerpass123')
+        self.shared = Project.objects.create(
+            name='Shared Project',
+            start_date=self.project.start_date,
+            end_date=self.project.end_date,
+            user=other_owner
+        )
+        self.shared.collaborators.add(self.user)
+        Project.objects.create(
+            name='Unrelated Project',
+            start_date=self.project.start_date,
+            end_date=self.project.end_date,
+            user=other_owner
+        )
+        dependent = Milestone.objects.create(name='Dependent', due_date=self.milestone.due_date, project=self.project)
+        dependent.dependencies.add(self.milestone)
+
+    def export(self, format_type):
+        import io
+        import zipfile
+        response = self.client.get(reverse('timeline_app:export_all_projects', kwargs={'format_type': format_type}))
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def test_export_all_projects_as_csv(self):
+        """Test that the ZIP holds one CSV per owned or shared project"""
+        self.client.login(username='testuser', password='testpass123')
+
+        archive = self.export('csv')
+
+        self.assertEqual(sorted(archive.namelist()), sorted([
+            f'{self.project.id}-test-project.csv', f'{self.shared.id}-shared-project.csv'
+        ]))
+        content = archive.read(f'{self.project.id}-test-project.csv').decode('utf-8')
+        self.assertIn('Test Milestone', content)
+        self.assertIn('Dependent,', content)
+
+    def test_export_all_projects_as_json(self):
+        """Test the JSON variant of the bulk export"""
+        self.client.login(username='testuser', password='testpass123')
+
+        archive = self.export('json')
+
+        data = json.loads(archive.read(f'{self.project.id}-test-project.json'))
+        dependent = next(m for m in data['milestones'] if m['name'] == 'Dependent')
+        self.assertEqual(dependent['dependencies'], [self.milestone.id])
+
+    def test_export_all_query_count_is_constant(self):
+        """Test that the number of queries does not grow with the number of projects"""
+        self.client.login(username='testuser', password='testpass123')
+        self.export('csv')  # Warm up the session
+
+        for i in range(5):
+            project = Project.objects.create(name=f'Extra {i}', start_date=self.project.start_date,
+                                             end_date=self.project.end_date, user=self.user)
+            Milestone.objects.create(name=f'Extra milestone {i}', due_date=self.project.end_date, project=project)
+
+        with self.assertNumQueries(5):  # session, user, projects, milestones, dependencies
+            self.export('csv')
+
+class MilestoneImportTests(TimelineAppBaseTestCase):
+    def upload(self, name, content):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        return self.client.post(
+            reverse('timeline_app:milestone_import', kwargs={'project_id': self.project.id}),
+            {'file': SimpleUploadedFile(name, content.encode('utf-8'))}
+        )
+
+    def test_import_csv_with_dependencies(self):
+        """Test importing milestones from CSV resolving dependencies by key and by name"""
+        self.project.collaborators.add(self.collaborator)
+        self.client.login(username='testuser', password='testpass123')
+        day = lambda n: (self.project.start_date + timedelta(days=n)).isoformat()
+        content = (
+            "key,name,start_date,due_date,status,dependencies\n"
+            f"d,Design,{day(16)},{day(18)},pending,Test Milestone\n"
+            f"b,Build,{day(19)},{day(25)},in_progress,d\n"
+            f"r,Release,{day(26)},{day(26)},,Design;b\n"
+        )
+
+        response = self.upload('plan.csv', content)
+
+        self.assertRedirects(response, reverse('timeline_app:project_detail', kwargs={'project_id': self.project.id}))
+        design = Milestone.objects.get(name='Design')
+        build = Milestone.objects.get(name='Build')
+        release = Milestone.objects.get(name='Release')
+        self.assertEqual(design.duration, 3)
+        self.assertEqual(build.status, 'in_progress')
+        self.assertEqual(list(design.dependencies.all()), [self.milestone])
+        self.assertEqual(set(release.dependencies.all()), {design, build})
+        # The closure index is rebuilt for the imported edges, keeping the shortest chain
+        self.assertTrue(MilestoneClosure.objects.filter(ancestor=self.milestone, descendant=release, depth=2).exists())
+        self.assertEqual(Notification.objects.filter(user=self.collaborator, notification_type='milestone_added').count(), 1)
+
+    def test_import_json(self):
+        """Test importing milestones from a JSON list in a bounded number of queries"""
+        from timeline_app.importers import import_milestones
+        records = [
+            {'key': str(i), 'name': f'Step {i}', 'due_date': (self.project.start_date + timedelta(days=i)).isoformat(),
+             'dependencies': [str(i - 1)] if i else []}
+            for i in range(20)
+        ]
+
+        # Existing names, milestones, edges, then the closure and rollup rebuilds
+        with self.assertNumQueries(17):
+            import_milestones(self.project, records)
+
+        self.assertEqual(Milestone.objects.filter(project=self.project).count(), 21)
+        self.assertEqual(Milestone.objects.get(name='Step 5').dependencies.get().name, 'Step 4')
+
+    def test_invalid_file_imports_nothing(self):
+        """Test that one invalid record rejects the whole file"""
+        self.client.login(username='testuser', password='testpass123')
+        day = lambda n: (self.project.start_date + timedelta(days=n)).isoformat()
+        content = json.dumps([
+            {'name': 'Inside', 'due_date': day(2)},
+            {'name': 'Outside', 'due_date': day(60)},
+            {'name': 'Orphan', 'due_date': day(3), 'dependencies': ['Missing']},
+        ])
+
+        response = self.upload('plan.json', content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'within the project timeframe')
+        self.assertEqual(Milestone.objects.filter(project=self.project).count(), 1)
+
+    def test_wrong_field_types_are_reported(self):
+        """Test that JSON values of the wrong type are reported per record instead of failing"""
+        self.client.login(username='testuser', password='testpass123')
+        day = (self.project.start_date + timedelta(days=2)).isoformat()
+        content = json.dumps([
+            {'name': 'Listed status', 'due_date': day, 'status': ['x']},
+            {'name': 'Numeric dependencies', 'due_date': day, 'dependencies': 5},
+            {'name': {'nested': True}, 'due_date': day},
+        ])
+
+        response = self.upload('plan.json', content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Record 1: status must be text')
+        self.assertContains(response, 'Record 2: dependencies must be a list of keys or names')
+        self.assertContains(response, 'Record 3: name must be text')
+        self.assertEqual(Milestone.objects.filter(project=self.project).count(), 1)
+
+    def test_key_matching_another_name(self):
+        """Test that a key equal to another record's name is only an error when referenced"""
+        from timeline_app.importers import import_milestones, MilestoneImportError
+        due = self.project.start_date.isoformat()
+        records = [
+            {'name': 'Design', 'due_date': due},
+            {'key': 'Design', 'name': 'Design review', 'due_date': due},
+            {'key': 'build', 'name': 'Build', 'due_date': due, 'dependencies': ['Design review']},
+        ]
+
+        import_milestones(self.project, records)
+        self.assertEqual(Milestone.objects.get(name='Build').dependencies.get().name, 'Design review')
+
+        records[2]['dependencies'] = ['Design']
+        with self.assertRaises(MilestoneImportError) as raised:
+            import_milestones(self.project, records)
+        self.assertEqual(raised.exception.errors, ["Build: dependency 'Design' is ambiguous, use a key"])
+
+    def test_import_rejects_cycles(self):
+        """Test that dependency cycles inside the file are rejected"""
+        from timeline_app.importers import import_milestones, MilestoneImportError
+        due = self.project.start_date.isoformat()
+        with self.assertRaises(MilestoneImportError):
+            import_milestones(self.project, [
+                {'name': 'A', 'due_date': due, 'dependencies': ['B']},
+                {'name': 'B', 'due_date': due, 'dependencies': ['A']},
+            ])
+        self.assertEqual(Milestone.objects.filter(project=self.project).count(), 1)
+
+    def test_only_owner_can_import(self):
+        """Test that collaborators cannot import milestones"""
+        self.project.collaborators.add(self.collaborator)
+        self.client.login(username='collaborator', password='collabpass123')
+
+        response = self.upload('plan.json', '[]')
+
+        self.assertRedirects(response, reverse('timeline_app:project_detail', kwargs={'project_id': self.project.id}))
+
+    def test_import_command(self):
+        """Test the import_milestones management command"""
+        from django.core.management import call_command
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write(f"name,due_date\nFrom CLI,{self.project.end_date.isoformat()}\n")
+        self.addCleanup(os.remove, f.name)
+
+        call_command('import_milestones', self.project.id, f.name, stdout=open(os.devnull, 'w'))
+
+        self.assertTrue(Milestone.objects.filter(project=self.project, name='From CLI', duration=1).exists())
+
+class QueryPlanTests(TimelineAppBaseTestCase):
+    """Run EXPLAIN QUERY PLAN on the queries of the main views and fail on full table scans"""
+
+    def setUp(self):
+        super().setUp()
+        from django.db import connection
+        if connection.vendor != 'sqlite':
+            self.skipTest('Query plans are checked with SQLite EXPLAIN QUERY PLAN')
+        self.project.collaborators.add(self.collaborator)
+        dependent = Milestone.objects.create(name='Dependent', due_date=self.project.end_date, project=self.project)
+        dependent.dependencies.add(self.milestone)
+        Notification.objects.create(user=self.user, notification_type='milestone_due', project=self.project,
+                                    milestone=self.milestone, message='Due soon')
+
+    def assertNoFullScans(self, run):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            run()
+
+        for query in queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plan = [row[-1] for row in cursor.fetchall()]
+            scans = [step for step in plan if step.startswith('SCAN')]
+            self.assertFalse(scans, f"Full scan in {query['sql']}: {scans}")
+
+    def get(self, url):
+        response = self.client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def test_views_use_indexes(self):
+        """Test that the queries of the main views never scan a whole table"""
+        self.client.login(username='testuser', password='testpass123')
+        project_id = self.project.id
+        urls = [
+            reverse('timeline_app:dashboard'),
+            reverse('timeline_app:project_detail', kwargs={'project_id': project_id}),
+            reverse('timeline_app:project_gantt_view', kwargs={'project_id': project_id}),
+            reverse('timeline_app:project_gantt_data', kwargs={'project_id': project_id}),
+            reverse('timeline_app:archived_projects'),
+            reverse('timeline_app:analytics'),
+            reverse('timeline_app:analytics_series'),
+            reverse('timeline_app:notifications'),
+            reverse('timeline_app:notifications') + '?unread=1',
+            reverse('timeline_app:export_project', kwargs={'project_id': project_id, 'format_type': 'csv'}),
+            reverse('timeline_app:export_all_projects', kwargs={'format_type': 'csv'}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertNoFullScans(lambda: self.assertEqual(self.get(url).status_code, 200))
+
+    def test_due_date_sweep_uses_indexes(self):
+        """Test that the due-date reminder sweep looks milestones up by due date"""
+        from timeline_app.utils import check_upcoming_milestones
+        self.assertNoFullScans(check_upcoming_milestones)
+
 class SecurityAndPermissionTests(TimelineAppBaseTestCase):
     def test_unauthorized_project_access(self):
         """Test unauthorized access to project"""
@@ -595,4 +2006,59 @@ class SecurityAndPermissionTests(TimelineAppBaseTestCase):
         self.assertContains(response, "Only the project owner can add milestones to this project")
         
         # Milestone should not be created
-        self.assertFalse(Milestone.objects.filter(name='Unauthorized Milestone').exists())
\ No newline at end of file
+        self.assertFalse(Milestone.objects.filter(name='Unauthorized Milestone').exists())
+    def test_access_check_does_not_load_collaborators(self):
+        """Test that project pages cost the same for widely shared projects and never load the collaborator list"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        self.project.collaborators.add(self.collaborator)
+        self.client.login(username='collaborator', password='collabpass123')
+        urls = [
+            reverse('timeline_app:project_detail', kwargs={'project_id': self.project.id}),
+            reverse('timeline_app:project_gantt_view', kwargs={'project_id': self.project.id}),
+            reverse('timeline_app:project_gantt_data', kwargs={'project_id': self.project.id}),
+        ]
+
+        def queries_per_url():
+            counts = []
+            for url in urls:
+                with CaptureQueriesContext(connection) as queries:
+                    self.assertEqual(self.client.get(url).status_code, 200)
+                self.assertFalse([q['sql'] for q in queries if q['sql'].startswith(
+                    'SELECT "auth_user"."id"') and 'timeline_app_project_collaborators' in q['sql']])
+                counts.append(len(queries))
+            return counts
+
+        queries_per_url()  # Create the unread notification counter
+        before = queries_per_url()
+        self.project.collaborators.add(*[
+            User.objects.create_user(username=f'user{i}', password='pass12345') for i in range(10)
+        ])
+        self.assertEqual(queries_per_url(), before)
+
+    def test_project_access_is_memoized_per_request(self):
+        """Test that resolving the same project twice in a request runs one query"""
+        from django.test import RequestFactory
+        from timeline_app.access import get_project
+        request = RequestFactory().get('/')
+        request.user = self.collaborator
+
+        with self.assertNumQueries(1):
+            project = get_project(request, self.project.id)
+            self.assertIs(get_project(request, str(self.project.id)), project)
+        self.assertFalse(project.can_view)
+
+        request = RequestFactory().get('/')
+        request.user = self.user
+        self.assertTrue(get_project(request, self.project.id).is_owner)
+        self.assertIsNone(get_project(request, self.project.id + 100))
+
+    def test_missing_project(self):
+        """Test that project pages for a missing project redirect with a message or return 404 JSON"""
+        self.client.login(username='testuser', password='testpass123')
+        missing = self.project.id + 100
+
+        response = self.client.get(reverse('timeline_app:project_detail', kwargs={'project_id': missing}), follow=True)
+        self.assertContains(response, "Project not found.")
+        response = self.client.get(reverse('timeline_app:project_gantt_data', kwargs={'project_id': missing}))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,87 @@
+"""Daily burndown, burnup and workload series for the analytics charts.
+
+The milestones are loaded once as NumPy arrays of day numbers. Every series is
+then a ``bincount`` of the days something happens on followed by a cumulative
+sum, so the cost grows with the number of milestones plus the number of days
+instead of their product.
+
+There is no completion timestamp, so a completed milestone counts as done on
+its due date. The actual burndown and burnup stop at today; the planned lines
+continue to the last due date.
+"""
+import numpy as np
+from django.utils import timezone
+
+from .models import Milestone
+
+
+def milestone_arrays(milestones):
+    """Return ``(start, due, completed)`` arrays for a Milestone queryset.
+
+    ``start`` and ``due`` are ``datetime64[D]``; milestones without a start
+    date start on their due date.
+    """
+    rows = list(milestones.order_by().values_list('start_date', 'due_date', 'status'))
+    if not rows:
+        empty = np.array([], dtype='datetime64[D]')
+        return empty, empty, np.array([], dtype=bool)
+
+    starts, dues, statuses = zip(*rows)
+    due = np.array(dues, dtype='datetime64[D]')
+    # None becomes NaT, which is replaced by the due date
+    start = np.array(starts, dtype='datetime64[D]')
+    start = np.where(np.isnat(start), due, np.minimum(start, due))
+    completed = np.array(statuses) == 'completed'
+    return start, due, completed
+
+
+def _cumulative(days, length, weights=None):
+    return np.cumsum(np.bincount(days, weights=weights, minlength=length)[:length]).astype(np.int64)
+
+
+def milestone_series(start, due, completed, today=None):
+    """Compute the daily series from the arrays returned by ``milestone_arrays``.
+
+    Returns a dict of equally long lists, ready to be passed to Chart.js:
+    ``labels`` (YYYY-MM-DD), ``planned_remaining`` and ``remaining``
+    (burndown), ``planned_done`` and ``completed`` (burnup), ``active``
+    (milestones whose start-to-due span covers the day) and ``total``.
+    """
+    today = np.datetime64(today or timezone.now().date(), 'D')
+    total = len(due)
+    if not total:
+        return {'labels': [], 'total': 0, 'planned_remaining': [], 'remaining': [],
+                'planned_done': [], 'completed': [], 'active': []}
+
+    first = min(start.min(), today)
+    last = max(due.max(), today)
+    length = int((last - first).astype(int)) + 1
+    start_day = (start - first).astype(np.int64)
+    due_day = (due - first).astype(np.int64)
+
+    planned_done = _cumulative(due_day, length)
+    completed_done = _cumulative(due_day[completed], length)
+
+    # +1 on the first day of each span, -1 on the day after it ends
+    changes = np.bincount(start_day, minlength=length + 1) - np.bincount(due_day + 1, minlength=length + 1)
+    active = np.cumsum(changes[:length])
+
+    # Nothing has been completed after today yet
+    elapsed = int((today - first).astype(int)) + 1
+    completed_list = completed_done[:elapsed].tolist() + [None] * (length - elapsed)
+    remaining_list = (total - completed_done[:elapsed]).tolist() + [None] * (length - elapsed)
+
+    return {
+        'labels': np.datetime_as_string(np.arange(first, last + 1)).tolist(),
+        'total': total,
+        'planned_remaining': (total - planned_done).tolist(),
+        'remaining': remaining_list,
+        'planned_done': planned_done.tolist(),
+        'completed': completed_list,
+        'active': active.tolist(),
+    }
+
+
+def project_series(project_ids, today=None):
+    """Compute the combined series of the milestones of the given projects."""
+    return milestone_series(*milestone_arrays(Milestone.objects.filter(project_id__in=project_ids)), today=today)
@@ -1,106 +1,399 @@
+from django.conf import settings
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import Mod
 from django.utils import timezone
 from datetime import datetime, timedelta
 from .models import Milestone, Notification
+from .notifications import notify
 import csv
-from django.http import HttpResponse
+import glob
+import hashlib
+import io
+import json
+import os
+import zipfile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, StreamingHttpResponse
+
+def check_upcoming_milestones(partition=None, changed_since=None):
+    """Check for milestones due within the next 3 days and create notifications.
+
+    Runs a fixed number of queries regardless of how many milestones are due:
+    the candidates with their projects and collaborators, the existing
+    reminders, and one bulk insert. ``partition`` is an optional
+    ``(remainder, modulus)`` pair limiting the check to projects with
+    id % modulus == remainder.
+    ``changed_since`` limits it to milestones updated at or after that time.
+    Returns the number of notifications created.
+    """
+    from django.contrib.auth.models import User
+    from django.db.models import Prefetch
 
-def check_upcoming_milestones():
-    """Check for milestones due within the next 3 days and create notifications"""
     today = datetime.now().date()
     three_days_from_now = today + timedelta(days=3)
-    
+
     # Find milestones due within the next 3 days
     upcoming_milestones = Milestone.objects.filter(
         due_date__range=[today, three_days_from_now]
+    ).select_related('project').only(
+        'id', 'name', 'due_date', 'project__id', 'project__user_id'
+    ).prefetch_related(
+        Prefetch('project__collaborators', queryset=User.objects.only('id'))
     )
-    
+
+    # Recipients that already have an unread reminder for a milestone. Incremental
+    # checks overlap the previous one, so there a reminder that was already read
+    # also counts as long as the milestone hasn't changed since it was sent
+    already_sent = Q(is_read=False)
+    if changed_since is not None:
+        already_sent |= Q(created_at__gte=F('milestone__updated_at'))
+    existing = Notification.objects.filter(
+        already_sent,
+        notification_type='milestone_due',
+        milestone__due_date__range=[today, three_days_from_now]
+    )
+
+    if partition is not None:
+        remainder, modulus = partition
+        upcoming_milestones = upcoming_milestones.annotate(
+            project_partition=Mod('project_id', modulus)
+        ).filter(project_partition=remainder)
+        existing = existing.annotate(
+            project_partition=Mod('milestone__project_id', modulus)
+        ).filter(project_partition=remainder)
+
+    if changed_since is not None:
+        upcoming_milestones = upcoming_milestones.filter(updated_at__gte=changed_since)
+        existing = existing.filter(milestone__updated_at__gte=changed_since)
+
+    already_notified = set(existing.values_list('user_id', 'milestone_id'))
+
+    notifications = []
     for milestone in upcoming_milestones:
-        # Create notification for the project owner
-        owner = milestone.project.user
+        project = milestone.project
         days_left = (milestone.due_date - today).days
-        
-        # Check if notification already exists
-        if not Notification.objects.filter(
-            user=owner,
-            notification_type='milestone_due',
-            milestone=milestone,
-            is_read=False
-        ).exists():
-            Notification.objects.create(
-                user=owner,
+        recipients = [project.user_id] + [collaborator.id for collaborator in project.collaborators.all()]
+
+        for user_id in recipients:
+            if (user_id, milestone.id) in already_notified:
+                continue
+            already_notified.add((user_id, milestone.id))
+            notifications.append(Notification(
+                user_id=user_id,
                 notification_type='milestone_due',
-                project=milestone.project,
+                project=project,
                 milestone=milestone,
                 message=f"Milestone '{milestone.name}' is due in {days_left} days."
-            )
-        
-        # Create notifications for collaborators
-        for collaborator in milestone.project.collaborators.all():
-            if not Notification.objects.filter(
-                user=collaborator,
-                notification_type='milestone_due',
-                milestone=milestone,
-                is_read=False
-            ).exists():
-                Notification.objects.create(
-                    user=collaborator,
-                    notification_type='milestone_due',
-                    project=milestone.project,
-                    milestone=milestone,
-                    message=f"Milestone '{milestone.name}' is due in {days_left} days."
-                )
+            ))
 
-def export_project_to_csv(project):
-    """Export project details to CSV"""
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{project.name}.csv"'
+    # Batch jobs report what they created, so never defer this fan-out
+    return notify(notifications, defer=False)
+
+def project_partitions(index, count, workers=1):
+    """Split shard ``index`` of ``count`` into ``workers`` ``(remainder, modulus)`` partitions.
+
+    Shard i of N holds the projects with id % N == i - 1, and worker w of W
+    the ones of those with id % (N * W) == i - 1 + N * w. This only depends on
+    the ids, so hosts that start at different times agree on the split.
+    """
+    modulus = count * workers
+    return [(index - 1 + count * worker, modulus) for worker in range(workers)]
+
+def check_milestone_shard(partition, changed_since=None):
+    """Run the due-milestone check for one project partition and report what it did.
+
+    Used as the task of the ``check_milestones --workers`` process pool, where each
+    worker process opens its own database connection. The pool outlives a tick
+    in daemon mode, so connections that went stale while idle are dropped first.
+    """
+    import time
+    from django.db import close_old_connections
+    close_old_connections()
+    started = time.monotonic()
+    try:
+        created = check_upcoming_milestones(partition, changed_since)
+    finally:
+        close_old_connections()
+    return {
+        'partition': partition,
+        'created': created,
+        'seconds': time.monotonic() - started,
+    }
+
+class Echo:
+    """A file-like object that returns what is written, for streaming csv.writer output."""
+    def write(self, value):
+        return value
+
+EXPORT_CHUNK_SIZE = 2000
+
+def milestone_export_rows(project, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield one export row per milestone of a project without loading them all at once.
+    
+    Milestones and dependency edges are read with two chunked cursors, both
+    ordered by milestone id, and merged as they stream.
+    """
+    statuses = dict(Milestone.STATUS_CHOICES)
+    milestones = Milestone.objects.filter(project=project).order_by('id').values_list(
+        'id', 'name', 'start_date', 'due_date', 'duration', 'status', 'description'
+    ).iterator(chunk_size=chunk_size)
+    edges = Milestone.dependencies.through.objects.filter(
+        from_milestone__project=project
+    ).order_by('from_milestone_id', 'to_milestone_id').values_list(
+        'from_milestone_id', 'to_milestone_id'
+    ).iterator(chunk_size=chunk_size)
     
-    writer = csv.writer(response)
-    writer.writerow(['Project Name', 'Start Date', 'End Date', 'Owner', 'Created At'])
-    writer.writerow([
+    edge = next(edges, None)
+    for milestone_id, name, start_date, due_date, duration, status, description in milestones:
+        dependencies = []
+        while edge is not None and edge[0] <= milestone_id:
+            if edge[0] == milestone_id:
+                dependencies.append(str(edge[1]))
+            edge = next(edges, None)
+        
+        yield [
+            milestone_id,
+            name,
+            start_date or due_date,
+            due_date,
+            duration,
+            statuses.get(status, status),
+            description or '',
+            ';'.join(dependencies)
+        ]
+
+def project_csv_rows(project, milestone_rows):
+    """Yield the CSV rows of a project export, given its milestone export rows."""
+    yield ['Project Name', 'Start Date', 'End Date', 'Owner', 'Created At']
+    yield [
         project.name, 
         project.start_date, 
         project.end_date, 
         project.user.username,
         project.created_at
-    ])
+    ]
     
-    writer.writerow([])  # Empty row
-    writer.writerow(['Milestones'])
-    writer.writerow(['Name', 'Due Date'])
+    yield []  # Empty row
+    yield ['Milestones']
+    yield ['ID', 'Name', 'Start Date', 'Due Date', 'Duration', 'Status', 'Description', 'Dependencies']
     
-    for milestone in project.milestone_set.all():
-        writer.writerow([milestone.name, milestone.due_date])
+    yield from milestone_rows
+
+def export_project_to_csv(project):
+    """Export project details to CSV, streaming the milestone rows"""
+    writer = csv.writer(Echo())
+    rows = (writer.writerow(row) for row in project_csv_rows(project, milestone_export_rows(project)))
     
+    response = StreamingHttpResponse(rows, content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{project.name}.csv"'
     return response
 
-def export_project_to_pdf(request, project):
+class ZipStream:
+    """An unseekable file-like buffer that zipfile writes into and a generator drains."""
+    def __init__(self):
+        self._chunks = []
+    
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def prefetched_milestone_rows(project):
+    """Build export rows from milestones prefetched with their dependencies."""
+    statuses = dict(Milestone.STATUS_CHOICES)
+    for milestone in project.milestone_set.all():
+        yield [
+            milestone.id,
+            milestone.name,
+            milestone.start_date or milestone.due_date,
+            milestone.due_date,
+            milestone.duration,
+            statuses.get(milestone.status, milestone.status),
+            milestone.description or '',
+            ';'.join(str(dependency.id) for dependency in milestone.dependencies.all())
+        ]
+
+def project_json(project):
+    """Serialize a project with prefetched milestones for the bulk JSON export."""
+    return json.dumps({
+        'id': project.id,
+        'name': project.name,
+        'start_date': project.start_date,
+        'end_date': project.end_date,
+        'owner': project.user.username,
+        'created_at': project.created_at,
+        'is_archived': project.is_archived,
+        'description': project.description or '',
+        'milestones': [
+            {
+                'id': milestone.id,
+                'name': milestone.name,
+                'start_date': milestone.start_date or milestone.due_date,
+                'due_date': milestone.due_date,
+                'duration': milestone.duration,
+                'status': milestone.status,
+                'description': milestone.description or '',
+                'dependencies': [dependency.id for dependency in milestone.dependencies.all()]
+            } for milestone in project.milestone_set.all()
+        ]
+    }, cls=DjangoJSONEncoder, indent=2)
+
+BULK_EXPORT_CHUNK_SIZE = 100
+
+def export_projects_to_zip(projects, format_type, filename):
+    """Stream a ZIP archive with one CSV or JSON entry per project.
+    
+    Projects are iterated in chunks with their milestones and dependencies
+    prefetched, so the query count only grows with the number of chunks and
+    at most one chunk is held in memory. Each entry is compressed and yielded
+    as it is written.
     """
-    Export project details as a PDF.
-    Currently implemented as plain text for easier testing.
-    For actual PDF generation, you can use xhtml2pdf or reportlab.
+    from django.db.models import Prefetch
+    from django.utils.text import slugify
+    
+    projects = projects.select_related('user').prefetch_related(
+        Prefetch('milestone_set', queryset=Milestone.objects.order_by('id')),
+        Prefetch('milestone_set__dependencies', queryset=Milestone.objects.only('id')),
+    ).order_by('id')
+    
+    def chunks():
+        stream = ZipStream()
+        with zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for project in projects.iterator(chunk_size=BULK_EXPORT_CHUNK_SIZE):
+                name = f"{project.id}-{slugify(project.name) or 'project'}.{format_type}"
+                with archive.open(name, mode='w') as entry:
+                    if format_type == 'json':
+                        entry.write(project_json(project).encode('utf-8'))
+                    else:
+                        text = io.TextIOWrapper(entry, encoding='utf-8', newline='')
+                        writer = csv.writer(text)
+                        for row in project_csv_rows(project, prefetched_milestone_rows(project)):
+                            writer.writerow(row)
+                        text.flush()
+                        text.detach()
+                yield stream.drain()
+        yield stream.drain()
+    
+    response = StreamingHttpResponse(chunks(), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+_pdf_executor = None
+
+class PdfExportError(Exception):
+    """Raised when a PDF export cannot be produced; the message is shown to the user."""
+
+def get_pdf_executor():
+    """Return the process pool used to render PDF exports, creating it on first use."""
+    global _pdf_executor
+    if _pdf_executor is None:
+        import atexit
+        from concurrent.futures import ProcessPoolExecutor
+        _pdf_executor = ProcessPoolExecutor(max_workers=settings.PDF_EXPORT_WORKERS)
+        atexit.register(_pdf_executor.shutdown)
+    return _pdf_executor
+
+def reset_pdf_executor(executor):
+    """Drop a broken process pool so the next render starts a new one."""
+    global _pdf_executor
+    if _pdf_executor is executor:
+        _pdf_executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def render_pdf(html, path):
+    """Render ``html`` to the PDF file ``path`` in the process pool, or inline without workers.
+    
+    A pool whose worker died (e.g. killed for running out of memory) is replaced
+    and the render retried once. Raises PdfExportError if the render fails or
+    takes longer than ``PDF_EXPORT_TIMEOUT``.
     """
-    # For testing purposes, we'll use text/plain format
-    response = HttpResponse(content_type='text/plain')
-    response['Content-Disposition'] = f'attachment; filename="{project.name}.txt"'
+    from concurrent.futures import TimeoutError
+    from concurrent.futures.process import BrokenProcessPool
+    from .pdf_export import render_pdf_file
     
-    # Add timestamp to show it's a current export
-    timestamp = timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+    if not settings.PDF_EXPORT_WORKERS:
+        render_pdf_file(html, path)
+        return
     
-    response.write(f"Project: {project.name}\n")
-    response.write(f"Date Range: {project.start_date} to {project.end_date}\n")
-    response.write(f"Owner: {project.user.username}\n\n")
-    response.write("Milestones:\n")
+    for attempt in range(2):
+        executor = get_pdf_executor()
+        try:
+            future = executor.submit(render_pdf_file, html, path)
+            future.result(timeout=settings.PDF_EXPORT_TIMEOUT)
+            return
+        except BrokenProcessPool:
+            reset_pdf_executor(executor)
+        except TimeoutError:
+            # A render that already started can't be stopped; it still fills the cache when it ends
+            future.cancel()
+            raise PdfExportError("The PDF export is taking too long. Please try again in a minute.")
+    raise PdfExportError("The PDF export failed. Please try again later.")
+
+def render_project_pdf(project, path):
+    """Render the PDF export of a project to ``path`` and remove exports of its older versions."""
+    from django.template.loader import render_to_string
+    from .pdf_export import gantt_charts
     
-    for milestone in project.milestone_set.all():
-        start_date = milestone.start_date if milestone.start_date else milestone.due_date
-        response.write(f"- {milestone.name}\n")
-        response.write(f"  Start: {start_date}\n")
-        response.write(f"  Due: {milestone.due_date}\n")
-        response.write(f"  Status: {milestone.get_status_display()}\n")
-        if milestone.description:
-            response.write(f"  Description: {milestone.description}\n")
-        response.write("\n")
-    
-    response.write(f"\nExport generated: {timestamp}")
-    return response
\ No newline at end of file
+    milestones = list(
+        Milestone.objects.filter(project=project)
+        .order_by('start_date', 'due_date', 'id')
+        .values('name', 'start_date', 'due_date', 'status', 'description')
+    )
+    statuses = dict(Milestone.STATUS_CHOICES)
+    for milestone in milestones:
+        milestone['start_date'] = milestone['start_date'] or milestone['due_date']
+        milestone['status_display'] = statuses.get(milestone['status'], milestone['status'])
+    
+    html = render_to_string('timeline_app/project_pdf_template.html', {
+        'project': project,
+        'milestones': milestones,
+        'gantt_charts': gantt_charts(project.start_date, project.end_date, milestones),
+        'generated_at': timezone.now(),
+    })
+    render_pdf(html, path)
+    
+    for old_path in glob.glob(os.path.join(settings.PDF_EXPORT_CACHE_DIR, f"project-{project.id}-*.pdf")):
+        if old_path != path:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+
+def project_pdf_path(project):
+    """Return the cache path of a project's PDF export for its current version.
+    
+    The version is the newest updated_at of the project and its milestones,
+    plus the milestone count so deletions produce a new file.
+    """
+    stats = Milestone.objects.filter(project=project).aggregate(latest=Max('updated_at'), count=Count('id'))
+    latest = max(filter(None, [project.updated_at, stats['latest']]))
+    version = hashlib.md5(f"{latest.isoformat()}:{stats['count']}".encode()).hexdigest()
+    return os.path.join(settings.PDF_EXPORT_CACHE_DIR, f"project-{project.id}-{version}.pdf")
+
+def export_project_to_pdf(request, project):
+    """
+    Export project details and a Gantt chart as a PDF.
+    Rendering happens in a process pool and the result is cached on disk per
+    project version, so unchanged projects are served straight from the file.
+    Raises PdfExportError if the PDF cannot be produced.
+    """
+    path = project_pdf_path(project)
+    
+    for attempt in range(2):
+        if not os.path.exists(path):
+            render_project_pdf(project, path)
+        try:
+            pdf = open(path, 'rb')
+        except FileNotFoundError:
+            # Another request removed it while cleaning up older versions
+            continue
+        return FileResponse(pdf, content_type='application/pdf',
+                            as_attachment=True, filename=f"{project.name}.pdf")
+    raise PdfExportError("The PDF export failed. Please try again later.")
@@ -0,0 +1,103 @@
+"""Caching of the computed dashboard and analytics contexts.
+
+Every project has a version token in the cache, and every user an entry
+holding a token of their own and the ids of the projects they can access.
+A user's data version combines their token with the tokens of those
+projects, and contexts are stored under a key that includes it, so a page can
+be served from the cache without touching the database as long as nothing the
+user can see changed.
+
+Writes to a project call ``invalidate_projects``, which replaces one token per
+project however many people share it. Changes to who can access a project
+call ``bump_data_versions`` for the users concerned, which drops their entry
+so their project list is reloaded. Both only touch the cache once the
+transaction commits, so no other request can cache the old data under the new
+version. Entries built for old versions are never read again and age out of
+the cache.
+
+The entries live in the ``settings.VIEW_CACHE_ALIAS`` cache. It has to be
+shared between processes (file-based, Redis, ...) when running several
+workers, otherwise a write in one worker doesn't invalidate the others.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Project
+
+
+def get_view_cache():
+    return caches[settings.VIEW_CACHE_ALIAS]
+
+
+def _user_key(user_id):
+    return f'views:user:{user_id}'
+
+
+def _project_key(project_id):
+    return f'views:project:{project_id}'
+
+
+def _accessible_project_ids(user_id):
+    shared_project_ids = Project.collaborators.through.objects.filter(user_id=user_id).values('project_id')
+    return sorted(
+        Project.objects.filter(Q(user_id=user_id) | Q(id__in=shared_project_ids)).values_list('id', flat=True)
+    )
+
+
+def data_version(user_id):
+    """Return the current data version of a user, built from their token and their projects' tokens."""
+    view_cache = get_view_cache()
+    key = _user_key(user_id)
+    entry = view_cache.get(key)
+    if entry is None:
+        # A new token can't match entries stored before the old one was dropped
+        view_cache.add(key, {'token': uuid.uuid4().hex, 'projects': _accessible_project_ids(user_id)}, None)
+        entry = view_cache.get(key)
+
+    project_keys = [_project_key(project_id) for project_id in entry['projects']]
+    tokens = view_cache.get_many(project_keys)
+    missing = [key for key in project_keys if key not in tokens]
+    if missing:
+        for key in missing:
+            view_cache.add(key, uuid.uuid4().hex, None)
+        tokens.update(view_cache.get_many(missing))
+
+    parts = [entry['token']] + [tokens.get(key, '') for key in project_keys]
+    return hashlib.md5(':'.join(parts).encode()).hexdigest()
+
+
+def bump_data_versions(user_ids):
+    """Give users a new data version and reload the projects they can access, once committed."""
+    keys = [_user_key(user_id) for user_id in set(user_ids) if user_id is not None]
+    if keys:
+        transaction.on_commit(lambda: get_view_cache().delete_many(keys))
+
+
+def invalidate_projects(project_ids):
+    """Give the given projects new version tokens, once committed.
+
+    Everyone who can see one of them gets a new data version with it.
+    """
+    keys = [_project_key(project_id) for project_id in set(project_ids) if project_id is not None]
+    if keys:
+        transaction.on_commit(lambda: get_view_cache().set_many({key: uuid.uuid4().hex for key in keys}, None))
+
+
+def cached_context(name, user, build, *key_parts):
+    """Return the context ``build()`` computes for ``user``, from the cache when possible.
+
+    ``key_parts`` are added to the cache key for contexts that depend on more
+    than the user's data, such as the current date.
+    """
+    view_cache = get_view_cache()
+    key = ':'.join(['views', name, str(user.pk), data_version(user.pk)] + [str(part) for part in key_parts])
+    context = view_cache.get(key)
+    if context is None:
+        context = build()
+        view_cache.set(key, context, settings.VIEW_CACHE_TIMEOUT)
+    return context
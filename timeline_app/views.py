@@ -2,7 +2,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .models import Project, Milestone, Notification
-from .forms import ProjectForm, MilestoneForm, ProjectShareForm, UserRegistrationForm
+from .forms import ProjectForm, MilestoneForm, ProjectShareForm, UserRegistrationForm, MilestoneImportForm
 import json
 from django.core.serializers import serialize
 from django.core.serializers.json import DjangoJSONEncoder
@@ -10,8 +10,13 @@ from django.contrib.auth import logout, login, authenticate
 from django.contrib.auth.models import User
 from django.contrib import messages
 from .utils import check_upcoming_milestones
-from django.db import models
-from django.core.mail import send_mail
+from .notifications import notify_users, notify_collaborators, mark_notifications_read, unread_count
+from .outbox import queue_email
+from .scheduling import load_project_graph, compute_schedule, cascade_reschedule, DependencyCycleError
+from .rollups import rebuild_project_rollups, project_rollups, STATUS_FIELDS, BUCKET_FIELDS
+from .view_cache import cached_context, invalidate_projects
+from .access import get_project, check_project_access, project_access_required
+from django.db import models, transaction
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.http import JsonResponse
@@ -32,60 +37,54 @@ def register(request):
         form = UserRegistrationForm()
     return render(request, 'registration/register.html', {'form': form})
 
+def dashboard_context(user):
+    """Build the dashboard context of ``user`` with one query."""
+    from django.db.models import Count, Q
+    from django.utils import timezone
+    from .rollups import OPEN_STATUSES
+
+    # Active projects the user owns or collaborates on, with their milestone progress
+    shared_project_ids = Project.collaborators.through.objects.filter(user=user).values('project_id')
+    projects = list(
+        Project.objects.filter(Q(user=user) | Q(id__in=shared_project_ids), is_archived=False)
+        .only('id', 'name', 'start_date', 'end_date')
+        .annotate(
+            milestone_total=Count('milestone'),
+            milestone_completed=Count('milestone', filter=Q(milestone__status='completed')),
+            milestone_overdue=Count('milestone', filter=Q(
+                milestone__status__in=OPEN_STATUSES, milestone__due_date__lt=timezone.now().date()
+            )),
+        )
+        .order_by('start_date', 'id')
+    )
+
+    # Data for the timeline
+    projects_list = [
+        {
+            'id': p.id,
+            'name': p.name,
+            'start_date': p.start_date.strftime('%Y-%m-%d'),
+            'end_date': p.end_date.strftime('%Y-%m-%d'),
+            'milestone_total': p.milestone_total,
+            'milestone_completed': p.milestone_completed,
+            'milestone_overdue': p.milestone_overdue,
+        }
+        for p in projects
+    ]
+
+    return {
+        'projects': projects,
+        'projects_json': json.dumps(projects_list)
+    }
+
 @login_required
 def dashboard(request):
-    try:
-        # Get projects owned by the user
-        owned_projects = Project.objects.filter(
-            user=request.user, 
-            is_archived=False
-        )
-        
-        # Get projects shared with the user (where user is a collaborator)
-        shared_projects = Project.objects.filter(
-            collaborators=request.user,
-            is_archived=False
-        ).exclude(
-            user=request.user  # Exclude projects where user is also the owner
-        )
-        
-        # Combine the querysets
-        all_projects = list(owned_projects) + list(shared_projects)
-        
-        # Create data for timeline
-        projects_list = []
-        for p in all_projects:
-            # Ensure all values are serializable
-            projects_list.append({
-                'name': str(p.name),
-                'start_date': p.start_date.strftime('%Y-%m-%d') if p.start_date else '',
-                'end_date': p.end_date.strftime('%Y-%m-%d') if p.end_date else '',
-                'id': p.id
-            })
-        
-        # Sort by start date (with error handling)
-        try:
-            projects_list.sort(key=lambda x: x['start_date'] if x['start_date'] else '9999-12-31')
-        except Exception as e:
-            print(f"Error sorting projects: {e}")
-        
-        # Convert to JSON with robust error handling
-        try:
-            import json
-            json_data = json.dumps(projects_list)
-        except Exception as e:
-            print(f"Error converting to JSON: {e}")
-            json_data = "[]"
-        
-    except Exception as e:
-        print(f"Error in dashboard: {e}")
-        all_projects = []
-        json_data = "[]"
-    
-    return render(request, 'timeline_app/dashboard.html', {
-        'projects': all_projects,
-        'projects_json': json_data
-    })
+    from django.utils import timezone
+
+    # The overdue counts change with the date even when no data does
+    context = cached_context('dashboard', request.user, lambda: dashboard_context(request.user),
+                             timezone.now().date())
+    return render(request, 'timeline_app/dashboard.html', context)
 
 @login_required
 def project_create(request):
@@ -102,47 +101,24 @@ def project_create(request):
     return render(request, 'timeline_app/project_form.html', {'form': form})
 
 @login_required
+@project_access_required()
 def project_detail(request, project_id):
-    try:
-        # First try to get the project by ID
-        project = Project.objects.get(id=project_id)
-        
-        # Check if the user has permission (is owner or collaborator)
-        if project.user != request.user and request.user not in project.collaborators.all():
-            messages.error(request, "You don't have permission to view this project.")
-            return redirect('timeline_app:dashboard')
-        
-        # Fetch milestones
-        milestones = Milestone.objects.filter(project=project)
-        
-        # Add a flag to indicate if the current user is the owner
-        is_owner = (project.user == request.user)
-        
-    except Project.DoesNotExist:
-        messages.error(request, "Project not found.")
-        return redirect('timeline_app:dashboard')
-    except Exception as e:
-        print(f"Error in project_detail: {e}")
-        messages.error(request, "An error occurred while loading the project.")
-        return redirect('timeline_app:dashboard')
+    project = request.project
+    
+    # Fetch milestones
+    milestones = Milestone.objects.filter(project=project)
     
     return render(request, 'timeline_app/project_detail.html', {
         'project': project,
         'milestones': milestones,
-        'is_owner': is_owner
+        'is_owner': project.is_owner
     })
 
 @login_required
+@project_access_required(owner_message="Only the project owner can add milestones to this project.")
 def milestone_create(request, project_id):
+    project = request.project
     try:
-        # Get the project by ID
-        project = Project.objects.get(id=project_id)
-        
-        # Check if the user is the owner
-        if project.user != request.user:
-            messages.error(request, "Only the project owner can add milestones to this project.")
-            return redirect('timeline_app:project_detail', project_id=project.id)
-        
         if request.method == 'POST':
             form = MilestoneForm(request.POST, project=project)
             if form.is_valid():
@@ -151,23 +127,18 @@ def milestone_create(request, project_id):
                 milestone.save()
                 
                 # Notify collaborators about the new milestone
-                for collaborator in project.collaborators.all():
-                    Notification.objects.create(
-                        user=collaborator,
-                        notification_type='milestone_added',
-                        message=f"{request.user.username} added milestone '{milestone.name}' to project '{project.name}'",
-                        project=project,
-                        milestone=milestone
-                    )
+                notify_collaborators(
+                    project,
+                    'milestone_added',
+                    f"{request.user.username} added milestone '{milestone.name}' to project '{project.name}'",
+                    milestone=milestone
+                )
                 
                 messages.success(request, 'Milestone added successfully!')
                 return redirect('timeline_app:project_detail', project_id=project.id)
         else:
             form = MilestoneForm(project=project)
     
-    except Project.DoesNotExist:
-        messages.error(request, "Project not found.")
-        return redirect('timeline_app:dashboard')
     except Exception as e:
         print(f"Error in milestone_create: {e}")
         messages.error(request, "An error occurred while adding the milestone.")
@@ -179,16 +150,47 @@ def milestone_create(request, project_id):
     })
 
 @login_required
+@project_access_required(owner_message="Only the project owner can import milestones into this project.")
+def milestone_import(request, project_id):
+    from .importers import parse_milestone_file, import_milestones, MilestoneImportError
+
+    project = request.project
+
+    import_errors = []
+    if request.method == 'POST':
+        form = MilestoneImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                records = parse_milestone_file(form.cleaned_data['file'].read(), form.cleaned_data['format'])
+                milestones = import_milestones(project, records)
+            except MilestoneImportError as e:
+                import_errors = e.errors
+            else:
+                # Notify collaborators once about the whole import
+                if milestones:
+                    notify_collaborators(
+                        project,
+                        'milestone_added',
+                        f"{request.user.username} imported {len(milestones)} milestone(s) into project '{project.name}'"
+                    )
+                messages.success(request, f'{len(milestones)} milestone(s) imported successfully!')
+                return redirect('timeline_app:project_detail', project_id=project.id)
+    else:
+        form = MilestoneImportForm()
+
+    return render(request, 'timeline_app/milestone_import.html', {
+        'form': form,
+        'project': project,
+        'import_errors': import_errors,
+    })
+
+@login_required
+@project_access_required(
+    owner_message="You don't have permission to edit this project. Only the project owner can make changes."
+)
 def project_update(request, project_id):
+    project = request.project
     try:
-        # First try to get the project by ID
-        project = Project.objects.get(id=project_id)
-        
-        # Check if the user is the owner
-        if project.user != request.user:
-            messages.error(request, "You don't have permission to edit this project. Only the project owner can make changes.")
-            return redirect('timeline_app:project_detail', project_id=project.id)
-            
         if request.method == 'POST':
             form = ProjectForm(request.POST, instance=project)
             if form.is_valid():
@@ -204,25 +206,18 @@ def project_update(request, project_id):
             'project': project
         })
         
-    except Project.DoesNotExist:
-        messages.error(request, "Project not found.")
-        return redirect('timeline_app:dashboard')
     except Exception as e:
         print(f"Error in project_update view: {e}")
         messages.error(request, "An error occurred while trying to update the project.")
         return redirect('timeline_app:dashboard')
 
 @login_required
+@project_access_required(
+    owner_message="You don't have permission to delete this project. Only the project owner can delete it."
+)
 def project_delete(request, project_id):
+    project = request.project
     try:
-        # First try to get the project by ID
-        project = Project.objects.get(id=project_id)
-        
-        # Check if the user is the owner
-        if project.user != request.user:
-            messages.error(request, "You don't have permission to delete this project. Only the project owner can delete it.")
-            return redirect('timeline_app:project_detail', project_id=project.id)
-            
         if request.method == 'POST':
             project.delete()
             messages.success(request, 'Project deleted successfully!')
@@ -232,9 +227,6 @@ def project_delete(request, project_id):
             'project': project
         })
         
-    except Project.DoesNotExist:
-        messages.error(request, "Project not found.")
-        return redirect('timeline_app:dashboard')
     except Exception as e:
         print(f"Error in project_delete view: {e}")
         messages.error(request, "An error occurred while trying to delete the project.")
@@ -246,16 +238,10 @@ def logout_view(request):
     return redirect('login')
 
 @login_required
+@project_access_required(owner_message="Only the project owner can share this project with others.")
 def share_project(request, project_id):
+    project = request.project
     try:
-        # Get the project by ID
-        project = Project.objects.get(id=project_id)
-        
-        # Check if the user is the owner
-        if project.user != request.user:
-            messages.error(request, "Only the project owner can share this project with others.")
-            return redirect('timeline_app:project_detail', project_id=project.id)
-        
         if request.method == 'POST':
             form = ProjectShareForm(request.POST)
             if form.is_valid():
@@ -268,7 +254,7 @@ def share_project(request, project_id):
                     # Check if user is already a collaborator
                     if collaborator == request.user:
                         messages.warning(request, "You can't add yourself as a collaborator.")
-                    elif collaborator in project.collaborators.all():
+                    elif project.collaborators.filter(id=collaborator.id).exists():
                         messages.info(request, f"{collaborator.username} is already a collaborator.")
                     else:
                         # Add the collaborator to the project
@@ -276,10 +262,10 @@ def share_project(request, project_id):
                         messages.success(request, f"Project shared with {collaborator.username} successfully!")
                         
                         # Create a notification for the collaborator
-                        notification = Notification.objects.create(
-                            user=collaborator,
-                            notification_type='project_shared', 
-                            message=f"{request.user.username} has shared the project '{project.name}' with you",
+                        notify_users(
+                            [collaborator.id],
+                            'project_shared',
+                            f"{request.user.username} has shared the project '{project.name}' with you",
                             project=project
                         )
                         
@@ -301,18 +287,8 @@ def share_project(request, project_id):
                         html_message = render_to_string('timeline_app/email/project_shared.html', context)
                         plain_message = strip_tags(html_message)
 
-                        # Send email
-                        try:
-                            send_mail(
-                                subject=subject,
-                                message=plain_message,
-                                from_email=None,  # Uses DEFAULT_FROM_EMAIL from settings
-                                recipient_list=[collaborator.email],
-                                html_message=html_message,
-                                fail_silently=False
-                            )
-                        except Exception as e:
-                            print(f"Error sending email: {e}")
+                        # Queue the email; the send_queued_emails worker delivers it
+                        queue_email(collaborator.email, subject, plain_message, html_message)
                     
                     return redirect('timeline_app:project_detail', project_id=project.id)
                     
@@ -328,69 +304,106 @@ def share_project(request, project_id):
             'current_collaborators': current_collaborators
         })
     
-    except Project.DoesNotExist:
-        messages.error(request, "Project not found.")
-        return redirect('timeline_app:dashboard')
     except Exception as e:
         print(f"Error in share_project view: {e}")
         messages.error(request, "An error occurred while trying to share the project.")
         return redirect('timeline_app:dashboard')
 
 @login_required
+@project_access_required(owner_message="Only the project owner can remove collaborators.")
 def remove_collaborator(request, project_id, user_id):
-    project = get_object_or_404(Project, id=project_id, user=request.user)
+    project = request.project
     collaborator = get_object_or_404(User, id=user_id)
     
-    if collaborator in project.collaborators.all():
+    if project.collaborators.filter(id=collaborator.id).exists():
         project.collaborators.remove(collaborator)
         messages.success(request, f"{collaborator.username} removed from collaborators.")
     
     return redirect('timeline_app:share_project', project_id=project.id)
 
 @login_required
+@project_access_required()
 def export_project(request, project_id, format_type):
-    # Get the base project by ID
-    project = get_object_or_404(Project, id=project_id)
-    
-    # Check if the user has permission to export this project
-    if project.user != request.user and request.user not in project.collaborators.all():
-        messages.error(request, "You don't have permission to export this project.")
-        return redirect('timeline_app:dashboard')
+    project = request.project
     
     if format_type == 'csv':
         from .utils import export_project_to_csv
         return export_project_to_csv(project)
     elif format_type == 'pdf':
-        from .utils import export_project_to_pdf
-        return export_project_to_pdf(request, project)
+        from .utils import PdfExportError, export_project_to_pdf
+        try:
+            return export_project_to_pdf(request, project)
+        except PdfExportError as e:
+            messages.error(request, str(e))
+            return redirect('timeline_app:project_detail', project_id=project.id)
     else:
         messages.error(request, f"Unknown export format: {format_type}")
         return redirect('timeline_app:project_detail', project_id=project.id)
 
 @login_required
-def notifications(request):
-    # Get all notifications for the current user
-    print(f"Retrieving notifications for user: {request.user.username} (ID: {request.user.id})")
-    
-    user_notifications = Notification.objects.filter(user=request.user)
-    print(f"Found {user_notifications.count()} notifications")
-    
-    # Print details of each notification for debugging
-    for notif in user_notifications:
-        print(f"Notification #{notif.id}: {notif.message} - for user {notif.user.username}")
-    
-    unread_count = user_notifications.filter(is_read=False).count()
+def export_all_projects(request, format_type):
+    """Export every project the user owns or collaborates on as a streamed ZIP archive"""
+    if format_type not in ('csv', 'json'):
+        messages.error(request, f"Unknown export format: {format_type}")
+        return redirect('timeline_app:dashboard')
     
+    from django.db.models import Q
+    from .utils import export_projects_to_zip
+    # A subquery instead of a join lets both sides of the OR use an index, and needs no DISTINCT
+    projects = Project.objects.filter(
+        Q(user=request.user) |
+        Q(id__in=Project.collaborators.through.objects.filter(user=request.user).values('project_id'))
+    )
+    return export_projects_to_zip(projects, format_type, f"{request.user.username}-projects.zip")
+
+NOTIFICATIONS_PAGE_SIZE = 50
+
+def notification_cursor(notification):
+    """Return the keyset cursor that continues after ``notification``."""
+    return f"{notification.created_at.isoformat()}_{notification.id}"
+
+def parse_notification_cursor(cursor):
+    """Return the (created_at, id) pair of a cursor, or None if it is invalid."""
+    from datetime import datetime
+    try:
+        created_at, notification_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(created_at), int(notification_id)
+    except (AttributeError, ValueError):
+        return None
+
+@login_required
+def notifications(request):
+    # Newest first, paginated by (created_at, id) so each page costs the same
+    user_notifications = Notification.objects.filter(user=request.user).select_related(
+        'project', 'milestone'
+    ).order_by('-created_at', '-id')
+
+    unread_only = request.GET.get('unread') == '1'
+    if unread_only:
+        user_notifications = user_notifications.filter(is_read=False)
+
+    cursor = parse_notification_cursor(request.GET.get('before'))
+    if cursor:
+        created_at, notification_id = cursor
+        user_notifications = user_notifications.filter(
+            models.Q(created_at__lt=created_at) | models.Q(created_at=created_at, id__lt=notification_id)
+        )
+
+    page = list(user_notifications[:NOTIFICATIONS_PAGE_SIZE + 1])
+    next_cursor = notification_cursor(page[NOTIFICATIONS_PAGE_SIZE - 1]) if len(page) > NOTIFICATIONS_PAGE_SIZE else None
+
     return render(request, 'timeline_app/notifications.html', {
-        'notifications': user_notifications,
-        'unread_count': unread_count
+        'notifications': page[:NOTIFICATIONS_PAGE_SIZE],
+        'unread_count': unread_count(request.user),
+        'unread_only': unread_only,
+        'next_cursor': next_cursor,
+        'is_first_page': cursor is None,
     })
 
 @login_required
 def mark_notification_read(request, notification_id):
     notification = get_object_or_404(Notification, id=notification_id, user=request.user)
-    notification.is_read = True
-    notification.save()
+    mark_notifications_read(request.user, Notification.objects.filter(id=notification.id))
     
     if notification.project:
         return redirect('timeline_app:project_detail', project_id=notification.project.id)
@@ -398,53 +411,35 @@ def mark_notification_read(request, notification_id):
 
 @login_required
 def mark_all_read(request):
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    mark_notifications_read(request.user, Notification.objects.all())
     messages.success(request, "All notifications marked as read.")
     return redirect('timeline_app:notifications')
 
 @login_required
+@project_access_required(owner_message="Only the project owner can archive this project.")
 def archive_project(request, project_id):
+    project = request.project
     try:
-        # Get the project by ID
-        project = Project.objects.get(id=project_id)
-        
-        # Check if the user is the owner
-        if project.user != request.user:
-            messages.error(request, "Only the project owner can archive this project.")
-            return redirect('timeline_app:project_detail', project_id=project.id)
-        
         project.is_archived = True
         project.save()
         messages.success(request, f"Project '{project.name}' has been archived.")
         return redirect('timeline_app:dashboard')
     
-    except Project.DoesNotExist:
-        messages.error(request, "Project not found.")
-        return redirect('timeline_app:dashboard')
     except Exception as e:
         print(f"Error in archive_project: {e}")
         messages.error(request, "An error occurred while archiving the project.")
         return redirect('timeline_app:dashboard')
 
 @login_required
+@project_access_required(owner_message="Only the project owner can unarchive this project.")
 def unarchive_project(request, project_id):
+    project = request.project
     try:
-        # Get the project by ID
-        project = Project.objects.get(id=project_id)
-        
-        # Check if the user is the owner
-        if project.user != request.user:
-            messages.error(request, "Only the project owner can unarchive this project.")
-            return redirect('timeline_app:project_detail', project_id=project.id)
-        
         project.is_archived = False
         project.save()
         messages.success(request, f"Project '{project.name}' has been unarchived.")
         return redirect('timeline_app:archived_projects')
     
-    except Project.DoesNotExist:
-        messages.error(request, "Project not found.")
-        return redirect('timeline_app:dashboard')
     except Exception as e:
         print(f"Error in unarchive_project: {e}")
         messages.error(request, "An error occurred while unarchiving the project.")
@@ -460,156 +455,102 @@ def archived_projects(request):
         'archived_projects': archived_projects
     })
 
-@login_required
-def analytics(request):
-    # Get user's projects (both owned and shared)
-    owned_projects = Project.objects.filter(user=request.user)
-    shared_projects = Project.objects.filter(collaborators=request.user)
-    
-    # Add debugging
-    print(f"Owned projects: {owned_projects.count()}")
-    print(f"Shared projects: {shared_projects.count()}")
-    
-    # Use a dictionary to prevent duplicates
-    project_dict = {p.id: p for p in owned_projects}
-    for p in shared_projects:
-        if p.id not in project_dict:
-            project_dict[p.id] = p
-            
-    all_projects = list(project_dict.values())
-    print(f"Total unique projects: {len(all_projects)}")
+def analytics_context(user):
+    """Build the analytics context of ``user``."""
+    from django.db.models import Q
+    from .models import ProjectCreationRollup
+    import calendar
+
+    # User's projects (both owned and shared)
+    shared_project_ids = Project.collaborators.through.objects.filter(user=user).values('project_id')
+    all_projects = list(
+        Project.objects.filter(Q(user=user) | Q(id__in=shared_project_ids))
+        .only('id', 'name', 'is_archived')
+        .order_by('id')
+    )
 
-    # List all project IDs for debugging
-    project_ids = [p.id for p in all_projects]
-    print(f"Project IDs included in analytics: {project_ids}")
-    
     # Basic statistics
     total_projects = len(all_projects)
     active_projects = sum(1 for p in all_projects if not p.is_archived)
     archived_projects = total_projects - active_projects
-    
-    # Milestones stats
-    all_milestones = Milestone.objects.filter(project__in=all_projects)
-    total_milestones = all_milestones.count()
-    print(f"Total milestones found: {total_milestones}")
-    
-    # Milestone completion stats
-    completed_milestones = all_milestones.filter(status='completed').count()
-    pending_milestones = all_milestones.filter(status='pending').count()
-    in_progress_milestones = all_milestones.filter(status='in_progress').count()
-    delayed_milestones = all_milestones.filter(status='delayed').count()
-    
-    print(f"Completed milestones: {completed_milestones}")
-    print(f"Pending milestones: {pending_milestones}")
-    print(f"In-progress milestones: {in_progress_milestones}")
-    print(f"Delayed milestones: {delayed_milestones}")
-    
+
+    # Milestone counts come from the precomputed per-project rollups
+    rollups = project_rollups([p.id for p in all_projects])
+    milestone_completion = {
+        field: sum(getattr(rollup, field) for rollup in rollups.values())
+        for field in ('total',) + STATUS_FIELDS + BUCKET_FIELDS
+    }
+
     # Calculate completion percentage
     completion_percentage = 0
-    if total_milestones > 0:
-        completion_percentage = round((completed_milestones / total_milestones) * 100)
-    print(f"Calculated completion percentage: {completion_percentage}%")
-    
-    from django.utils import timezone
-    today = timezone.now().date()
-    
-    # Calculate overdue milestones (due date in past but not completed)
-    overdue_milestones = all_milestones.filter(
-        due_date__lt=today,
-        status__in=['pending', 'in_progress', 'delayed']
-    ).count()
-    
-    # Regular milestone time stats
-    upcoming_milestones = all_milestones.filter(due_date__gt=today).count()
-    past_milestones = all_milestones.filter(due_date__lt=today).count()
-    today_milestones = all_milestones.filter(due_date=today).count()
-    
-    # Project timeline data for chart
-    from collections import defaultdict
-    import calendar
-    
-    # Get project counts by month
-    months_data = defaultdict(int)
-    for project in all_projects:
-        month_year = project.created_at.strftime('%Y-%m')
-        months_data[month_year] += 1
-    
-    # Sort by date
-    sorted_months = sorted(months_data.keys())
+    if milestone_completion['total'] > 0:
+        completion_percentage = round((milestone_completion['completed'] / milestone_completion['total']) * 100)
+    milestone_completion['completion_percentage'] = completion_percentage
+
+    # Project counts by creation month
     month_labels = []
     month_counts = []
-    
-    for month_year in sorted_months:
-        year, month = map(int, month_year.split('-'))
-        month_name = calendar.month_name[month]
-        month_labels.append(f"{month_name} {year}")
-        month_counts.append(months_data[month_year])
-    
-    # Milestone completion rate
-    milestone_completion = {
-        'total': total_milestones,
-        'upcoming': upcoming_milestones,
-        'past': past_milestones,
-        'today': today_milestones,
-        'completed': completed_milestones,
-        'pending': pending_milestones,
-        'in_progress': in_progress_milestones,
-        'delayed': delayed_milestones,
-        'overdue': overdue_milestones,
-        'completion_percentage': completion_percentage
-    }
+    for row in ProjectCreationRollup.objects.filter(user=user, count__gt=0).order_by('month'):
+        month_labels.append(f"{calendar.month_name[row.month.month]} {row.month.year}")
+        month_counts.append(row.count)
+
+    # Projects sorted by milestone count (descending)
+    top_projects = sorted(
+        ({'id': p.id, 'name': p.name, 'milestone_count': rollups[p.id].total} for p in all_projects),
+        key=lambda x: x['milestone_count'],
+        reverse=True
+    )
 
-    print(f"Final milestone stats: {milestone_completion}")
-    print(f"Completion percentage being sent to template: {completion_percentage}")
-    
-    # Format the month data as JSON with explicit dumps
-    import json
-    
-    month_labels_json = json.dumps(month_labels)
-    month_counts_json = json.dumps(month_counts)
-    
-    # Test the JSON parsing to make sure it's valid
-    try:
-        test_parse = json.loads(month_labels_json)
-        test_parse = json.loads(month_counts_json)
-        print(f"JSON validation successful:")
-        print(f"Month labels: {month_labels_json}")
-        print(f"Month counts: {month_counts_json}")
-    except json.JSONDecodeError as e:
-        print(f"JSON validation failed: {e}")
-        # Provide fallback values
-        month_labels_json = "[]"
-        month_counts_json = "[]"
-    
-    # Get projects by milestones count
-    projects_by_milestones = []
-    for project in all_projects:
-        milestone_count = Milestone.objects.filter(project=project).count()
-        projects_by_milestones.append({
-            'id': project.id,
-            'name': project.name,
-            'milestone_count': milestone_count
-        })
-    
-    # Sort by milestone count (descending)
-    projects_by_milestones.sort(key=lambda x: x['milestone_count'], reverse=True)
-    top_projects = projects_by_milestones
-    
     context = {
         'total_projects': total_projects,
         'active_projects': active_projects,
         'archived_projects': archived_projects,
         'milestone_stats': milestone_completion,
         'top_projects': top_projects,
-        'month_labels': month_labels_json,
-        'month_counts': month_counts_json,
+        'month_labels': json.dumps(month_labels),
+        'month_counts': json.dumps(month_counts),
     }
-    
-    print(f"Context being sent to template: {context}")
-    
+
+    return context
+
+@login_required
+def analytics(request):
+    from django.utils import timezone
+
+    # The due-date buckets change with the date even when no data does
+    context = cached_context('analytics', request.user, lambda: analytics_context(request.user),
+                             timezone.now().date())
     return render(request, 'timeline_app/analytics.html', context)
 
 
+@login_required
+def analytics_series(request):
+    """Serve the daily burndown, burnup and active-milestone series as JSON for Chart.js.
+    
+    Covers every project the user can access, or only the one given by ``project``.
+    """
+    from django.db.models import Q
+    from django.utils import timezone
+    from .timeseries import project_series
+
+    project_id = request.GET.get('project')
+    if project_id is not None:
+        if not project_id.isdigit():
+            return JsonResponse({'error': 'Invalid project'}, status=400)
+        denied = check_project_access(request, get_project(request, project_id), json=True)
+        if denied is not None:
+            return denied
+
+    def build():
+        if project_id is not None:
+            return project_series([int(project_id)])
+        shared_project_ids = Project.collaborators.through.objects.filter(user=request.user).values('project_id')
+        projects = Project.objects.filter(Q(user=request.user) | Q(id__in=shared_project_ids))
+        return project_series(projects.values_list('id', flat=True))
+
+    series = cached_context('analytics_series', request.user, build, timezone.now().date(), project_id or 'all')
+    return JsonResponse(series)
+
 @login_required
 def project_diagnostic(request):
     """A diagnostic view to help troubleshoot project visibility issues"""
@@ -786,12 +727,10 @@ def project_diagnostic(request):
 @login_required
 def milestone_update(request, milestone_id):
     milestone = get_object_or_404(Milestone, id=milestone_id)
-    project = milestone.project
-    
-    # Check if the user is the owner
-    if project.user != request.user:
-        messages.error(request, "Only the project owner can edit milestones.")
-        return redirect('timeline_app:project_detail', project_id=project.id)
+    project = get_project(request, milestone.project_id)
+    denied = check_project_access(request, project, owner_message="Only the project owner can edit milestones.")
+    if denied is not None:
+        return denied
     
     if request.method == 'POST':
         form = MilestoneForm(request.POST, instance=milestone, project=project)
@@ -812,12 +751,10 @@ def milestone_update(request, milestone_id):
 @login_required
 def update_milestone_status(request, milestone_id, status):
     milestone = get_object_or_404(Milestone, id=milestone_id)
-    project = milestone.project
-    
-    # Check if the user is the owner
-    if project.user != request.user:
-        messages.error(request, "Only the project owner can update milestone status.")
-        return redirect('timeline_app:project_detail', project_id=project.id)
+    project = get_project(request, milestone.project_id)
+    denied = check_project_access(request, project, owner_message="Only the project owner can update milestone status.")
+    if denied is not None:
+        return denied
     
     # Validate the status
     valid_statuses = dict(Milestone.STATUS_CHOICES).keys()
@@ -833,47 +770,24 @@ def update_milestone_status(request, milestone_id, status):
     return redirect('timeline_app:project_detail', project_id=project.id)
 
 @login_required
+@project_access_required()
 def project_gantt_view(request, project_id):
+    project = request.project
     try:
-        # Get the project by ID
-        project = get_object_or_404(Project, id=project_id)
+        # Milestone data for the chart is loaded asynchronously from project_gantt_data
+        milestones = Milestone.objects.filter(project=project).order_by('start_date', 'id')
+        milestone_count = milestones.count()
         
-        # Check if the user has permission (is owner or collaborator)
-        if project.user != request.user and request.user not in project.collaborators.all():
-            messages.error(request, "You don't have permission to view this project.")
-            return redirect('timeline_app:dashboard')
-        
-        # Fetch milestones
-        milestones = Milestone.objects.filter(project=project)
-        
-        # Prepare milestones for JSON serialization
-        milestones_list = []
-        for milestone in milestones:
-            # Get dependencies for this milestone
-            dependencies = list(milestone.dependencies.values_list('id', flat=True))
-            
-            # Use start_date if available, otherwise use due_date as both start and end
-            start_date = milestone.start_date if milestone.start_date else milestone.due_date
-            
-            milestones_list.append({
-                'id': milestone.id,
-                'name': milestone.name,
-                'start_date': start_date.strftime('%Y-%m-%d'),
-                'due_date': milestone.due_date.strftime('%Y-%m-%d'),
-                'duration': milestone.duration,
-                'status': milestone.status,
-                'description': milestone.description or '',
-                'dependencies': dependencies
-            })
-        
-        # Convert to JSON
-        import json
-        milestones_json = json.dumps(milestones_list)
+        # Large projects load the chart window by window and only list the first milestones
+        windowed = milestone_count > GANTT_WINDOW_THRESHOLD
+        if windowed:
+            milestones = milestones[:GANTT_TABLE_LIMIT]
         
         return render(request, 'timeline_app/gantt_view.html', {
             'project': project,
             'milestones': milestones,
-            'milestones_json': milestones_json
+            'milestone_count': milestone_count,
+            'windowed': windowed
         })
         
     except Exception as e:
@@ -881,17 +795,175 @@ def project_gantt_view(request, project_id):
         messages.error(request, "An error occurred while loading the Gantt chart.")
         return redirect('timeline_app:dashboard')
 
+GANTT_WINDOW_THRESHOLD = 500  # Projects with more milestones load the Gantt chart in windows
+GANTT_WINDOW_MAX_LIMIT = 1000
+GANTT_TABLE_LIMIT = 100  # Rows of the milestone table rendered for windowed projects
+
+def gantt_milestone_data(milestone, dependencies, milestone_schedule=None):
+    """Serialize one milestone value dict for the Gantt chart."""
+    # Use start_date if available, otherwise use due_date as both start and end
+    start_date = milestone['start_date'] if milestone['start_date'] else milestone['due_date']
+    
+    return {
+        'id': milestone['id'],
+        'name': milestone['name'],
+        'start_date': start_date.strftime('%Y-%m-%d'),
+        'due_date': milestone['due_date'].strftime('%Y-%m-%d'),
+        'duration': milestone['duration'],
+        'status': milestone['status'],
+        'description': milestone['description'] or '',
+        'dependencies': dependencies,
+        'earliest_start': milestone_schedule['earliest_start'].strftime('%Y-%m-%d') if milestone_schedule else None,
+        'latest_start': milestone_schedule['latest_start'].strftime('%Y-%m-%d') if milestone_schedule else None,
+        'slack': milestone_schedule['slack'] if milestone_schedule else None,
+        'is_critical': milestone_schedule['is_critical'] if milestone_schedule else False
+    }
+
+def build_gantt_data(project):
+    """Build the Gantt chart payload of a project: milestones, dependencies and schedule."""
+    # Load milestones and dependency edges in two queries
+    graph = load_project_graph(project)
+    milestones = graph['milestones']
+    
+    try:
+        schedule = compute_schedule(project, graph)
+    except DependencyCycleError:
+        schedule = {'milestones': {}, 'critical_path': [], 'finish_date': None}
+    
+    # Prepare milestones for JSON serialization
+    milestones_list = []
+    for position, milestone in enumerate(milestones):
+        # Dependencies come from the adjacency lists instead of one query per milestone
+        dependencies = [milestones[pred]['id'] for pred in graph['predecessors'][position]]
+        milestones_list.append(
+            gantt_milestone_data(milestone, dependencies, schedule['milestones'].get(milestone['id']))
+        )
+    
+    return {
+        'milestones': milestones_list,
+        'critical_path': schedule['critical_path']
+    }
+
+def build_gantt_window(project, start, end, offset=0, limit=200):
+    """Build the Gantt payload for the milestones overlapping the dates start..end.
+    
+    Rows are ordered by start date and paged with offset/limit, so the work is
+    proportional to the window rather than the project. The schedule needs the
+    whole dependency graph and is therefore not included.
+    """
+    from django.db.models import Q
+    rows = list(
+        Milestone.objects.filter(project=project, due_date__gte=start)
+        .filter(Q(start_date__lte=end) | Q(start_date__isnull=True, due_date__lte=end))
+        .order_by('start_date', 'id')
+        .values('id', 'name', 'start_date', 'due_date', 'duration', 'status', 'description')
+        [offset:offset + limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    dependencies = {row['id']: [] for row in rows}
+    edges = Milestone.dependencies.through.objects.filter(
+        from_milestone_id__in=dependencies.keys()
+    ).values_list('from_milestone_id', 'to_milestone_id')
+    for dependent_id, dependency_id in edges:
+        dependencies[dependent_id].append(dependency_id)
+    
+    return {
+        'milestones': [gantt_milestone_data(row, dependencies[row['id']]) for row in rows],
+        'critical_path': [],
+        'window': {
+            'start': start.strftime('%Y-%m-%d'),
+            'end': end.strftime('%Y-%m-%d'),
+            'offset': offset,
+            'limit': limit,
+            'has_more': has_more
+        }
+    }
+
+def gantt_data_etag(project):
+    """Return an ETag for the Gantt payload of a project without building it.
+    
+    The payload only changes when the project or one of its milestones is
+    saved (dependency changes touch the dependent milestone's updated_at) or
+    when a milestone is deleted, which changes the count.
+    """
+    import hashlib
+    from django.db.models import Count, Max
+    stats = Milestone.objects.filter(project=project).aggregate(latest=Max('updated_at'), count=Count('id'))
+    version = f"{project.id}:{project.updated_at.isoformat()}:{stats['latest']}:{stats['count']}"
+    return '"%s"' % hashlib.md5(version.encode()).hexdigest()
+
+@login_required
+@project_access_required(json=True)
+def project_gantt_data(request, project_id):
+    """Serve the Gantt chart payload as JSON, answering If-None-Match with 304.
+    
+    With ``start`` and ``end`` query parameters (YYYY-MM-DD) only the milestones
+    overlapping that date window are returned, paged with ``offset``/``limit``.
+    """
+    from django.utils.cache import get_conditional_response
+    
+    project = request.project
+    
+    etag = gantt_data_etag(project)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    
+    if 'start' in request.GET or 'end' in request.GET:
+        from datetime import datetime
+        try:
+            start = datetime.strptime(request.GET.get('start', ''), '%Y-%m-%d').date()
+            end = datetime.strptime(request.GET.get('end', ''), '%Y-%m-%d').date()
+            offset = max(int(request.GET.get('offset', 0)), 0)
+            limit = min(max(int(request.GET.get('limit', 200)), 1), GANTT_WINDOW_MAX_LIMIT)
+        except ValueError:
+            return JsonResponse({'error': 'Invalid window parameters'}, status=400)
+        data = build_gantt_window(project, start, end, offset, limit)
+    else:
+        data = build_gantt_data(project)
+    
+    response = JsonResponse(data)
+    response['ETag'] = etag
+    # Let browsers keep the payload but revalidate it on every use
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+def parse_milestone_dates(project, start_date, due_date):
+    """Parse YYYY-MM-DD milestone dates and validate them against the project timeframe.
+    
+    Raises ValueError with a user-facing message if the dates are invalid.
+    """
+    from datetime import datetime
+    try:
+        start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
+        due_date_obj = datetime.strptime(due_date, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError('Invalid date format')
+    
+    # Check if dates are within project timeframe
+    if start_date_obj < project.start_date or due_date_obj > project.end_date:
+        raise ValueError('Milestone dates must be within project timeframe')
+    
+    # Check if start_date is before or equal to due_date
+    if start_date_obj > due_date_obj:
+        raise ValueError('Start date cannot be after due date')
+    
+    return start_date_obj, due_date_obj
+
 @login_required
 @require_POST
 def update_milestone_dates(request, milestone_id):
     try:
         # Get the milestone
         milestone = get_object_or_404(Milestone, id=milestone_id)
-        project = milestone.project
-        
-        # Check if the user is the owner
-        if project.user != request.user:
-            return JsonResponse({'error': 'You do not have permission to update this milestone'}, status=403)
+        project = get_project(request, milestone.project_id)
+        denied = check_project_access(
+            request, project, owner_message='You do not have permission to update this milestone', json=True
+        )
+        if denied is not None:
+            return denied
         
         # Parse the request data
         data = json.loads(request.body)
@@ -899,41 +971,104 @@ def update_milestone_dates(request, milestone_id):
         due_date = data.get('due_date')
         
         # Validate dates
-        from datetime import datetime
         try:
-            start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
-            due_date_obj = datetime.strptime(due_date, '%Y-%m-%d').date()
-        except ValueError:
-            return JsonResponse({'error': 'Invalid date format'}, status=400)
-        
-        # Check if dates are within project timeframe
-        if start_date_obj < project.start_date or due_date_obj > project.end_date:
-            return JsonResponse({
-                'error': 'Milestone dates must be within project timeframe'
-            }, status=400)
-        
-        # Check if start_date is before or equal to due_date
-        if start_date_obj > due_date_obj:
-            return JsonResponse({'error': 'Start date cannot be after due date'}, status=400)
+            start_date_obj, due_date_obj = parse_milestone_dates(project, start_date, due_date)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
         
-        # Calculate duration
-        from datetime import timedelta
-        duration = (due_date_obj - start_date_obj).days + 1  # Include both start and end dates
-        
-        # Update the milestone
-        milestone.start_date = start_date_obj
-        milestone.due_date = due_date_obj
-        milestone.duration = duration
-        milestone.save()
+        # Update the milestone and shift every milestone that depends on it
+        try:
+            updated = cascade_reschedule(milestone, start_date_obj, due_date_obj)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
         
         return JsonResponse({
             'success': True,
             'id': milestone.id,
             'start_date': start_date,
             'due_date': due_date,
-            'duration': duration
+            'duration': updated[0].duration,
+            'milestones': [
+                {
+                    'id': m.id,
+                    'start_date': m.start_date.strftime('%Y-%m-%d'),
+                    'due_date': m.due_date.strftime('%Y-%m-%d'),
+                    'duration': m.duration
+                } for m in updated
+            ]
         })
         
     except Exception as e:
         print(f"Error updating milestone dates: {e}")
-        return JsonResponse({'error': str(e)}, status=500)
\ No newline at end of file
+        return JsonResponse({'error': str(e)}, status=500)
+
+@login_required
+@require_POST
+@project_access_required(owner_message='You do not have permission to update these milestones', json=True)
+def update_milestone_dates_batch(request, project_id):
+    """Update the dates of several milestones of one project in a single request.
+    
+    Expects a JSON body of the form
+    {"milestones": [{"id": 1, "start_date": "YYYY-MM-DD", "due_date": "YYYY-MM-DD"}, ...]}.
+    Every entry is validated before anything is written; the changes are then
+    saved with one bulk_update. Dependents are not cascaded.
+    """
+    project = request.project
+    
+    # Parse the request data
+    try:
+        entries = json.loads(request.body).get('milestones')
+    except (ValueError, AttributeError):
+        entries = None
+    if not isinstance(entries, list) or not entries:
+        return JsonResponse({'error': 'Expected a non-empty list of milestones'}, status=400)
+    
+    ids = [entry.get('id') if isinstance(entry, dict) else None for entry in entries]
+    for milestone_id in ids:
+        if not isinstance(milestone_id, int) or isinstance(milestone_id, bool):
+            return JsonResponse({'error': 'Milestone ids must be integers'}, status=400)
+    
+    # Only milestones that belong to this project may be updated
+    project_milestone_ids = set(
+        Milestone.objects.filter(project=project, id__in=set(ids)).values_list('id', flat=True)
+    )
+    
+    from django.utils import timezone
+    now = timezone.now()
+    updated = {}
+    for entry, milestone_id in zip(entries, ids):
+        if milestone_id not in project_milestone_ids:
+            return JsonResponse({'error': f'Unknown milestone: {milestone_id}'}, status=400)
+        try:
+            start_date_obj, due_date_obj = parse_milestone_dates(
+                project, entry.get('start_date'), entry.get('due_date')
+            )
+        except ValueError as e:
+            return JsonResponse({'error': str(e), 'id': milestone_id}, status=400)
+        
+        # Later entries for the same milestone win
+        updated[milestone_id] = Milestone(
+            id=milestone_id,
+            start_date=start_date_obj,
+            due_date=due_date_obj,
+            duration=(due_date_obj - start_date_obj).days + 1,  # Include both start and end dates
+            updated_at=now
+        )
+    
+    with transaction.atomic():
+        Milestone.objects.bulk_update(list(updated.values()), ['start_date', 'due_date', 'duration', 'updated_at'])
+        # bulk_update bypasses the signals that maintain the analytics rollups and cached views
+        rebuild_project_rollups([project.id])
+        invalidate_projects([project.id])
+    
+    return JsonResponse({
+        'success': True,
+        'milestones': [
+            {
+                'id': m.id,
+                'start_date': m.start_date.strftime('%Y-%m-%d'),
+                'due_date': m.due_date.strftime('%Y-%m-%d'),
+                'duration': m.duration
+            } for m in updated.values()
+        ]
+    })
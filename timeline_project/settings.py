@@ -136,6 +136,44 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# PDF exports are rendered in a process pool and cached on disk per project version.
+# Set PDF_EXPORT_WORKERS to 0 to render in the request thread instead.
+PDF_EXPORT_CACHE_DIR = os.path.join(BASE_DIR, 'export_cache', 'pdf')
+PDF_EXPORT_WORKERS = 2
+PDF_EXPORT_TIMEOUT = 60  # Seconds to wait for a render
+
+# Create notifications for many recipients in a background thread after the
+# request's transaction commits, instead of inside the request.
+NOTIFICATION_FANOUT_DEFERRED = False
+
+# Seconds a user's unread notification count stays cached. Writes clear the entry
+# immediately; the timeout bounds staleness when each process has its own cache.
+NOTIFICATION_COUNT_CACHE_TIMEOUT = 60
+
+# `manage.py prune_notifications` deletes read notifications older than this.
+NOTIFICATION_RETENTION_DAYS = 90
+
+# The dashboard and analytics contexts are cached per user in the 'views' cache
+# until one of the user's projects changes. It is file-based so that every
+# worker process sees the same entries; tests use a local-memory cache instead.
+# Once MAX_ENTRIES is reached the file-based cache deletes a random third of its
+# files (1/CULL_FREQUENCY), not the least recently used ones, and every write
+# lists the cache directory to check the limit. For least-recently-used eviction
+# across several workers, use Django's RedisCache with Redis configured for
+# `maxmemory-policy allkeys-lru`.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'views': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'views'),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+VIEW_CACHE_ALIAS = 'views'
+VIEW_CACHE_TIMEOUT = 60 * 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -154,4 +192,12 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # For testing
 # EMAIL_USE_TLS = True
 # EMAIL_HOST_USER = 'your-email@gmail.com'  # Your email address
 # EMAIL_HOST_PASSWORD = 'your-app-password'  # App password for Gmail
-DEFAULT_FROM_EMAIL = 'Timeline App <noreply@timelineapp.example.com>'
\ No newline at end of file
+DEFAULT_FROM_EMAIL = 'Timeline App <noreply@timelineapp.example.com>'
+
+# Emails are queued in the OutgoingEmail table and sent by `manage.py send_queued_emails`.
+# A failed email is retried after EMAIL_OUTBOX_RETRY_DELAY seconds, doubling each time.
+# A worker claims its batch for EMAIL_OUTBOX_CLAIM_TIMEOUT seconds, after which the emails
+# it didn't get to report on are picked up again.
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
+EMAIL_OUTBOX_CLAIM_TIMEOUT = 600
\ No newline at end of file